@@ -1,6 +1,6 @@
 {
     'name': 'Opne Phone Api Sync to the CRM',
-    'version': '18.1.0',
+    'version': '18.1.3',
     'summary': 'Synchronize OpenPhone data with Odoo CRM seamlessly.',
     'description': 'This module integrates OpenPhone API with Odoo CRM to synchronize contacts and communication data.',
     'author': 'Sojib Mondol',
@@ -10,14 +10,26 @@
     'depends': ['base', 'web', 'crm', 'contacts'],  
     'data': [
         'security/ir.model.access.csv',
+        'data/openphone_sync_job_cron.xml',
+        'data/openphone_webhook_event_cron.xml',
+        'data/openphone_call_sync_cron.xml',
+        'data/openphone_message_sync_cron.xml',
+        'data/openphone_sync_metric_cron.xml',
+        'data/openphone_reconcile_cron.xml',
+        'views/openphone_sync_metric_views.xml',
         'views/res_config_settings_views.xml',
         'views/openphone_sync_menu.xml',
         'views/add_openphone_contact_id_in_res_partner_from_view.xml',
         'views/actionbutton_for_chatter.xml',
+        'views/openphone_sync_job_views.xml',
+        'views/openphone_call_views.xml',
+        'views/openphone_call_templates.xml',
+        'views/openphone_message_views.xml',
+        'views/openphone_webhook_event_views.xml',
     ],
     'assets': {
         'web.assets_backend': [
-           
+            'meta_openPhone_api_sync_to_CRM/static/src/**/*',
         ],
         'web.assets_frontend': [
             
@@ -0,0 +1,3 @@
+from . import call_history
+from . import metrics
+from . import webhook
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from werkzeug.exceptions import NotFound
+
+from odoo import http
+from odoo.http import request
+
+class OpenPhoneCallHistoryController(http.Controller):
+
+    @http.route('/openphone/call_history', type='json', auth='user')
+    def openphone_call_history(self, partner_id, offset=0, limit=20, direction=None, status=None,
+                               date_from=None, date_to=None, refresh=False):
+        """Page through the stored calls of a partner, for the partner form call history widget."""
+        partner = request.env['res.partner'].browse(int(partner_id)).exists()
+        if not partner:
+            return {'calls': [], 'total': 0, 'offset': 0, 'limit': limit, 'statuses': [], 'error': None}
+        return partner.get_openphone_call_history(
+            offset=offset, limit=limit, direction=direction, status=status,
+            date_from=date_from, date_to=date_to, refresh=refresh)
+
+    @http.route('/openphone/call/<int:call_id>/recording', type='http', auth='user')
+    def openphone_call_recording(self, call_id):
+        """
+        Redirect to the recording of a call. OpenPhone signs recording URLs for
+        a limited time, so the links shown in Odoo point here and a fresh URL
+        is resolved on each click.
+        """
+        call = request.env['openphone.call'].browse(call_id).exists()
+        if not call:
+            raise NotFound()
+        call.check_access('read')
+        url = call.sudo()._get_recording_url()
+        if not url:
+            raise NotFound()
+        return request.redirect(url, local=False)
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+import hmac
+
+from odoo import http
+from odoo.http import request
+
+class OpenPhoneMetricsController(http.Controller):
+
+    @http.route('/openphone/metrics', type='http', auth='public', methods=['GET'], save_session=False)
+    def openphone_metrics(self, token=None, **kwargs):
+        """Expose the OpenPhone API metrics to Prometheus (``?token=`` required)."""
+        expected = request.env['ir.config_parameter'].sudo().get_param('openphone.metrics.token')
+        if not expected or not token or not hmac.compare_digest(expected, token):
+            return request.not_found()
+        body = request.env['openphone.sync.metric'].sudo()._prometheus_text()
+        return request.make_response(body, headers=[('Content-Type', 'text/plain; version=0.0.4')])
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+
+from odoo import http
+from odoo.http import request
+
+from ..tools.webhook import SIGNATURE_HEADER, verify_signature
+
+_logger = logging.getLogger(__name__)
+
+class OpenPhoneWebhookController(http.Controller):
+
+    @http.route('/openphone/webhook', type='http', auth='public', methods=['POST'], csrf=False, save_session=False)
+    def openphone_webhook(self, **kwargs):
+        """
+        Receive an OpenPhone webhook. The event is only verified and queued here
+        so OpenPhone gets its acknowledgement immediately; it is applied by the
+        webhook event cron.
+        """
+        body = request.httprequest.get_data()
+        secret = request.env['ir.config_parameter'].sudo().get_param('openphone.webhook.secret')
+        if not verify_signature(secret, request.httprequest.headers.get(SIGNATURE_HEADER), body):
+            _logger.warning("Rejected OpenPhone webhook with an invalid signature")
+            return request.make_response('Invalid signature', status=401)
+
+        try:
+            event = json.loads(body)
+        except ValueError:
+            _logger.warning("Rejected OpenPhone webhook with an invalid JSON body")
+            return request.make_response('Invalid payload', status=400)
+        if not isinstance(event, dict) or not event.get('id') or not event.get('type'):
+            return request.make_response('Invalid payload', status=400)
+
+        request.env['openphone.webhook.event'].sudo()._enqueue(event)
+        return request.make_response('', status=200)
@@ -0,0 +1,11 @@
+def migrate(cr, version):
+    """
+    The API key used to be shipped as module data. Detach the parameter from
+    the module so the update does not delete the key configured on existing
+    databases; it remains the fallback of the companies without their own key.
+    """
+    cr.execute("""
+        DELETE FROM ir_model_data
+         WHERE model = 'ir.config_parameter'
+           AND name = 'default_openphone_api_key'
+    """)
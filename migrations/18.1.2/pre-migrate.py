@@ -0,0 +1,17 @@
+from odoo.tools.sql import column_exists, create_column
+
+
+def migrate(cr, version):
+    """
+    Calls used to store the signed recording URL, which expires after an hour.
+    Only whether the call has a recording is kept; the link is resolved when
+    opened.
+    """
+    if not column_exists(cr, 'openphone_call', 'recording_url'):
+        return
+    create_column(cr, 'openphone_call', 'has_recording', 'boolean')
+    cr.execute("""
+        UPDATE openphone_call
+           SET has_recording = TRUE
+         WHERE recording_url IS NOT NULL AND recording_url != ''
+    """)
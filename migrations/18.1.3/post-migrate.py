@@ -0,0 +1,49 @@
+def migrate(cr, version):
+    """
+    Contact and message sync resume points used to be system parameters,
+    whose writes clear the registry caches of every worker. They now live on
+    openphone.sync.cursor; move the runs in progress over.
+    """
+    cr.execute("""
+        INSERT INTO openphone_sync_cursor (name, company_id, page_token, create_date, write_date)
+        SELECT substring(param.key from '^openphone\\.(?:sync\\.)?([a-z_]+)\\.page_token\\.\\d+$'),
+               company.id, param.value, now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC'
+          FROM ir_config_parameter param
+          JOIN res_company company
+            ON company.id = substring(param.key from '\\.(\\d+)$')::int
+         WHERE param.key ~ '^openphone\\.(sync\\.(phone_numbers|contacts)|reconcile)\\.page_token\\.\\d+$'
+           AND param.value IS NOT NULL AND param.value != ''
+        ON CONFLICT DO NOTHING
+    """)
+    cr.execute("""
+        UPDATE openphone_sync_cursor cursor
+           SET started_at = param.value::timestamp
+          FROM ir_config_parameter param
+         WHERE cursor.name = 'reconcile'
+           AND param.key = 'openphone.reconcile.started_at.' || cursor.company_id
+           AND param.value IS NOT NULL AND param.value != ''
+    """)
+    cr.execute("""
+        INSERT INTO openphone_sync_cursor (name, company_id, create_date, write_date)
+        SELECT DISTINCT 'messages', company.id, now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC'
+          FROM ir_config_parameter param
+          JOIN res_company company
+            ON company.id = substring(param.key from '\\.(\\d+)$')::int
+         WHERE param.key ~ '^openphone\\.message_sync\\.(page_token|started_at|updated_after)\\.\\d+$'
+        ON CONFLICT DO NOTHING
+    """)
+    for key, column, cast in [('page_token', 'page_token', ''), ('started_at', 'started_at', '::timestamp'),
+                              ('updated_after', 'synced_until', '::timestamp')]:
+        cr.execute(f"""
+            UPDATE openphone_sync_cursor cursor
+               SET {column} = param.value{cast}
+              FROM ir_config_parameter param
+             WHERE cursor.name = 'messages'
+               AND param.key = 'openphone.message_sync.{key}.' || cursor.company_id
+               AND param.value IS NOT NULL AND param.value != ''
+        """)
+    cr.execute("""
+        DELETE FROM ir_config_parameter
+         WHERE key ~ '^openphone\\.(sync\\.(phone_numbers|contacts)|reconcile)\\.(page_token|started_at)\\.\\d+$'
+            OR key ~ '^openphone\\.message_sync\\.(page_token|started_at|updated_after)\\.\\d+$'
+    """)
@@ -1,6 +1,18 @@
+from . import res_company
 from . import res_partner_model
+from . import openphone_sync_job
+from . import openphone_sync_cursor
+from . import openphone_call
+from . import openphone_call_recording
+from . import openphone_message
+from . import openphone_webhook_event
+from . import openphone_sync_metric
 from . import fetch_usets_and_sync_with_odoo_contacts
 from . import post_contact_data_to_openphone
 from . import update_contact_data
 from . import delete_contact_data
-from . import list_call_in_chatter
\ No newline at end of file
+from . import reconcile_contacts
+from . import list_call_in_chatter
+from . import call_history
+from . import fetch_openphone_messages
+from . import res_config_settings
\ No newline at end of file
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+import requests
+from odoo import models, fields, _
+
+from ..tools.cache import TTLCache
+from ..tools.openphone_client import get_openphone_client
+
+_logger = logging.getLogger(__name__)
+
+# Partners whose calls were refreshed from OpenPhone recently, per database
+_refreshed_partners = TTLCache(maxsize=4096)
+DEFAULT_REFRESH_INTERVAL = 60
+CALL_HISTORY_FIELDS = ['call_id', 'direction', 'status', 'duration', 'participants',
+                       'created_at', 'completed_at', 'has_recording']
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    def _refresh_openphone_calls(self):
+        """
+        Pull the partner's calls created since the last sync, with their
+        recordings. Partners refreshed less than ``openphone.call_history.refresh_interval``
+        seconds ago are not fetched again. Returns an error message, if any.
+        """
+        self.ensure_one()
+        if not self.openphone_phone_normalized:
+            return _("No phone number is defined for this partner.")
+        cache_key = (self.env.cr.dbname, self.id)
+        hit, _refreshed = _refreshed_partners.get(cache_key)
+        if hit:
+            return None
+
+        company = self._get_openphone_company()
+        if not company._get_openphone_api_key():
+            return _("No OpenPhone API key found. Please configure it in settings.")
+        headers = company._get_openphone_headers()
+        client = get_openphone_client(self.env)
+        Call = self.env['openphone.call'].sudo()
+        try:
+            new_calls = Call._sync_partner_calls(self, client, headers).get(self, Call)
+            recordings = self._fetch_call_recordings(new_calls.mapped('call_id'), headers, client)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            _logger.error("Error fetching call logs for partner %s: %s", self.name, e)
+            return _("Error fetching call logs: %s", str(e))
+        new_calls.filtered(lambda call: recordings.get(call.call_id)).has_recording = True
+
+        refresh_interval = int(self.env['ir.config_parameter'].sudo().get_param(
+            'openphone.call_history.refresh_interval', DEFAULT_REFRESH_INTERVAL))
+        _refreshed_partners.set(cache_key, True, refresh_interval)
+        return None
+
+    def get_openphone_call_history(self, offset=0, limit=20, direction=None, status=None,
+                                   date_from=None, date_to=None, refresh=False):
+        """
+        Return one page of the partner's stored calls, newest first, for the
+        call history widget. OpenPhone is only queried when ``refresh`` is set.
+        ``date_from`` and ``date_to`` are inclusive dates.
+        """
+        self.ensure_one()
+        self.check_access('read')
+        error = self._refresh_openphone_calls() if refresh else None
+
+        domain = [('partner_id', '=', self.id)]
+        if direction:
+            domain.append(('direction', '=', direction))
+        if status:
+            domain.append(('status', '=', status))
+        if date_from:
+            domain.append(('created_at', '>=', fields.Date.to_date(date_from)))
+        if date_to:
+            domain.append(('created_at', '<', fields.Date.to_date(date_to) + timedelta(days=1)))
+
+        Call = self.env['openphone.call']
+        limit = max(1, min(int(limit), 200))
+        calls = Call.search_fetch(domain, CALL_HISTORY_FIELDS, offset=int(offset), limit=limit)
+        statuses = [status for [status] in Call._read_group(
+            [('partner_id', '=', self.id), ('status', '!=', False)], ['status'], order='status')]
+        return {
+            'calls': [{
+                'id': call.id,
+                'call_id': call.call_id,
+                'direction': call.direction,
+                'status': call.status,
+                'duration': call.duration,
+                'participants': call.participants,
+                'created_at': fields.Datetime.to_string(call.created_at),
+                'completed_at': fields.Datetime.to_string(call.completed_at),
+                'recording_url': call.recording_url,
+            } for call in calls],
+            'total': Call.search_count(domain),
+            'offset': int(offset),
+            'limit': limit,
+            'statuses': statuses,
+            'error': error,
+        }
@@ -4,56 +4,57 @@ import requests
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from ..tools.openphone_client import get_openphone_client
+
 _logger = logging.getLogger(__name__)
 
 class ResPartner(models.Model):
     _inherit = 'res.partner'
 
-    def _delete_openphone_contact(self, partner):
-        """Delete the contact in OpenPhone."""
-        # Fetch API key from system parameters
-        api_key = self.env['ir.config_parameter'].sudo().get_param('openphone.api.key', default='')
-        if not api_key:
-            _logger.warning("OpenPhone API key is missing. Please configure it.")
-            raise UserError(_("No OpenPhone API key found. Please configure it in settings."))
-
-        # Get OpenPhone contact ID from the partner
-        openphone_contact_id = partner.openphone_contact_id
+    def _prepare_openphone_delete_request(self, openphone_contact_id, partner_name=None, company=None):
+        """
+        Build the DELETE request removing the contact from the OpenPhone
+        workspace of ``company`` (the current company by default).
+        """
         if not openphone_contact_id:
-            _logger.warning("No OpenPhone contact ID found for partner: %s", partner.name)
+            _logger.warning("No OpenPhone contact ID found for partner: %s", partner_name)
             raise UserError(_("No OpenPhone contact ID found for this partner. Contact deletion is not possible."))
 
         api_url = f"https://api.openphone.com/v1/contacts/{openphone_contact_id}"
 
-        headers = {
-            "Authorization": api_key
-        }
-
-        _logger.debug("OpenPhone API URL for deletion: %s", api_url)
-
+        # API key of the partner's OpenPhone workspace
+        headers = (company or self.env.company)._get_openphone_headers()
+
+        return {'method': 'DELETE', 'url': api_url, 'headers': headers}
+
+    def _process_openphone_delete_response(self, partner_name, response):
+        """Check the OpenPhone answer to a contact deletion."""
+        if response.status_code == 204:  # No Content indicates successful deletion
+            _logger.info("Successfully deleted contact in OpenPhone: %s", partner_name)
+        elif response.status_code == 404:
+            # Already gone, e.g. a replayed job whose first attempt went through
+            _logger.info("Contact of %s was already deleted in OpenPhone", partner_name)
+        else:
+            # Log and raise an error for non-successful status codes
+            _logger.error("Failed to delete contact in OpenPhone: %s", response.text)
+            # The status and answer are kept on the failed sync job
+            raise UserError(_("Failed to delete contact in OpenPhone (HTTP %(status)s): %(error)s",
+                              status=response.status_code, error=response.text[:500]))
+
+    def _delete_openphone_contact(self, openphone_contact_id, partner_name=None, company=None):
+        """Delete the contact in OpenPhone."""
+        request = self._prepare_openphone_delete_request(openphone_contact_id, partner_name, company)
         try:
             # Send DELETE request to OpenPhone API
-            response = requests.delete(api_url, headers=headers)
-            _logger.debug("OpenPhone API Response Status Code: %s", response.status_code)
-            _logger.debug("OpenPhone API Response Content: %s", response.text)
-
-            if response.status_code == 204:  # No Content indicates successful deletion
-                _logger.info("Successfully deleted contact in OpenPhone: %s", partner.name)
-            else:
-                # Log and raise an error for non-successful status codes
-                _logger.error("Failed to delete contact in OpenPhone: %s", response.text)
-                raise UserError(_("Failed to delete contact in OpenPhone. Check logs for details."))
-
+            response = get_openphone_client(self.env).request(**request)
         except requests.exceptions.RequestException as e:
             _logger.error("Failed to delete contact in OpenPhone: %s", str(e))
             raise UserError(_("Failed to delete contact in OpenPhone. Check logs for details."))
+        self._process_openphone_delete_response(partner_name, response)
 
     def unlink(self):
-        """Override unlink method to send delete requests to OpenPhone."""
-        for partner in self:
-            if partner.openphone_contact_id:
-                try:
-                    self._delete_openphone_contact(partner)
-                except UserError as e:
-                    _logger.warning("Contact deletion in OpenPhone failed for partner %s: %s", partner.name, str(e))
+        """Override unlink method to queue delete requests for OpenPhone."""
+        if not self._is_openphone_origin():
+            # Partners whose creation is still queued are simply dropped from the queue
+            self.env['openphone.sync.job'].sudo()._enqueue(self, 'delete')
         return super(ResPartner, self).unlink()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import logging
+import requests
+from odoo import models, _
+from odoo.exceptions import UserError
+
+from ..tools.openphone_client import get_openphone_client
+
+_logger = logging.getLogger(__name__)
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    def action_fetch_openphone_messages(self):
+        """
+        Button action syncing the OpenPhone messages of the selected partners
+        on every workspace number, then opening them.
+        """
+        client = get_openphone_client(self.env)
+        Call = self.env['openphone.call'].sudo()
+        Conversation = self.env['openphone.conversation'].sudo()
+
+        partners = self.filtered('openphone_phone_normalized')
+        count = 0
+        # Each company has its own OpenPhone workspace, API key and rate limit
+        for company, company_partners in partners._group_by_openphone_company().items():
+            headers = company._get_openphone_headers()
+            try:
+                phone_number_ids = Call._get_phone_number_ids(headers)
+                conversations = Conversation._get_conversations([
+                    (phone_number_id, partner.openphone_phone_normalized)
+                    for partner in company_partners
+                    for phone_number_id in phone_number_ids
+                ])
+                for conversation in conversations.values():
+                    # Only messages created since the last fetch are transferred and stored
+                    count += conversation._sync_messages(client, headers)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                _logger.error("Error fetching OpenPhone messages: %s", e)
+                raise UserError(_("Error fetching OpenPhone messages: %s", str(e)))
+
+        _logger.info("Fetched %d new OpenPhone messages for %d partners", count, len(partners))
+        if len(self) == 1:
+            return self.action_view_openphone_messages()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Messages Fetched'),
+                'message': _('%s new OpenPhone messages were fetched.', count),
+                'sticky': False,
+            },
+        }
@@ -3,6 +3,10 @@ import requests
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from ..tools.openphone_client import get_openphone_client
+from ..tools.phone import normalize_phone_number
+from .openphone_call import parse_openphone_datetime
+
 _logger = logging.getLogger(__name__)
 
 class OpenPhoneContactSync(models.Model):
@@ -11,33 +15,24 @@ class OpenPhoneContactSync(models.Model):
 
     @api.model
     def fetch_and_sync_contacts(self):
-        """Fetch phone numbers and sync with Odoo contacts."""
-        api_key = self.env['ir.config_parameter'].sudo().get_param('openphone.api.key', default='')
-
-        if not api_key:
-            raise UserError(_("No OpenPhone API key found. Please configure it in settings."))
-
-        # API URL
-        api_url = "https://api.openphone.com/v1/phone-numbers"
-
-        headers = {
-            "Authorization": api_key,
-            "Content-Type": "application/json"
-        }
+        """
+        Fetch phone numbers and contacts from the OpenPhone workspace of the
+        current company and sync them with Odoo contacts.
+        """
+        company = self.env.company
+        headers = company._get_openphone_headers()
+        Cursor = self.env['openphone.sync.cursor'].sudo()
 
         try:
-            # Fetch data from OpenPhone API
-            response = requests.get(api_url, headers=headers)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            data = response.json().get("data", [])
-            
-            if not data:
+            phone_numbers = self._sync_pages(
+                "https://api.openphone.com/v1/phone-numbers", headers,
+                Cursor._get_cursor('phone_numbers', company), self._sync_phone_number_page)
+            if not phone_numbers:
                 _logger.warning("No phone numbers found in OpenPhone API response.")
-                return
 
-            for phone_data in data:
-                # Process each phone number entry
-                self._sync_phone_number(phone_data)
+            self._sync_pages(
+                "https://api.openphone.com/v1/contacts", headers,
+                Cursor._get_cursor('contacts', company), self._sync_contact_page)
 
             _logger.info("OpenPhone contact synchronization completed successfully.")
 
@@ -45,34 +40,197 @@ class OpenPhoneContactSync(models.Model):
             _logger.error("Failed to fetch data from OpenPhone API: %s", str(e))
             raise UserError(_("Failed to fetch data from OpenPhone API."))
 
+    @api.model
+    def _iter_pages(self, api_url, headers, page_token=None, page_size=100, params=None):
+        """
+        Walk an OpenPhone list endpoint page by page, yielding each page's
+        records together with the token of the following page.
+        """
+        client = get_openphone_client(self.env)
+        params = dict(params or {}, maxResults=page_size)
+        while True:
+            if page_token:
+                params['pageToken'] = page_token
+            response = client.get(api_url, headers=headers, params=params)
+            response.raise_for_status()  # Raise an exception for HTTP errors
+            payload = response.json()
+            page_token = payload.get('nextPageToken')
+            yield payload.get('data', []), page_token
+            if not page_token:
+                return
+
+    @api.model
+    def _sync_pages(self, api_url, headers, cursor, process_page):
+        """
+        Stream every page of an endpoint through ``process_page``, committing
+        after each page. The next page token is stored on the ``cursor``
+        (openphone.sync.cursor) so an interrupted sync resumes where it
+        stopped. Returns the number of records.
+        """
+        page_token = cursor.page_token or None
+        if page_token:
+            _logger.info("Resuming OpenPhone sync of %s from page token %s", api_url, page_token)
+
+        count = 0
+        for records, next_page_token in self._iter_pages(api_url, headers, page_token):
+            process_page(records)
+            count += len(records)
+            cursor.page_token = next_page_token or False
+            self.env.cr.commit()
+            # Drop the ORM cache so memory stays flat regardless of the number of pages
+            self.env.invalidate_all()
+        return count
+
+    def _sync_phone_number_page(self, phone_numbers):
+        """
+        Sync one page of OpenPhone phone numbers: existing contacts are resolved
+        with a single indexed query on the normalized phone and the missing ones
+        are created in one batch.
+        """
+        new_numbers = {}
+        for phone_data in phone_numbers:
+            phone_number = phone_data.get('number')
+            formatted_phone_number = phone_data.get('formattedNumber')  # Use formatted number
+            phone_name = phone_data.get('name', '')  # Use the name from phone data (e.g., "ALL CITY CLEANER" or "America")
+
+            if not phone_number or not phone_name:
+                _logger.warning("Phone number or name missing. Skipping: %s", phone_data)
+                continue
+
+            _logger.debug("Processing phone data: number=%s, name=%s", phone_number, phone_name)
+            normalized_number = normalize_phone_number(phone_number)
+            new_numbers.setdefault(normalized_number, {
+                'name': phone_name,  # Use the name from the phone data
+                'phone': formatted_phone_number or phone_number,  # Use the formatted phone number
+                **self.env.company._get_openphone_created_partner_values(),
+            })
+
+        if not new_numbers:
+            return
+
+        # Check which numbers already have a contact; new ones must not be pushed back to OpenPhone
+        Partner = self.env['res.partner'].with_context(openphone_sync_origin='openphone')
+        existing = Partner.search_read(
+            self.env.company._get_openphone_partner_domain() + [('openphone_phone_normalized', 'in', list(new_numbers))],
+            ['openphone_phone_normalized'])
+        for partner in existing:
+            _logger.debug("Contact already exists with number: %s", partner['openphone_phone_normalized'])
+            new_numbers.pop(partner['openphone_phone_normalized'], None)
+
+        if not new_numbers:
+            return
+
+        # Create the new contacts in Odoo
+        _logger.info("Creating %d new contacts from OpenPhone phone numbers", len(new_numbers))
+        new_contacts = Partner.create(list(new_numbers.values()))
+        new_contacts._message_log_batch(bodies={
+            contact.id: _("New contact created with phone number '%s'.") % contact.phone
+            for contact in new_contacts
+        })
+
     def _sync_phone_number(self, phone_data):
         """Sync a single phone number and create contact."""
-        phone_number = phone_data.get('number')
-        formatted_phone_number = phone_data.get('formattedNumber')  # Use formatted number
-        phone_name = phone_data.get('name', '')  # Use the name from phone data (e.g., "ALL CITY CLEANER" or "America")
+        self._sync_phone_number_page([phone_data])
+
+    @api.model
+    def _prepare_partner_values_from_contact(self, contact):
+        """Map an OpenPhone contact to res.partner values."""
+        default_fields = contact.get('defaultFields') or {}
+        emails = [email.get('value') for email in default_fields.get('emails') or [] if email.get('value')]
+        phones = [phone.get('value') for phone in default_fields.get('phoneNumbers') or [] if phone.get('value')]
+        name = " ".join(filter(None, [default_fields.get('firstName'), default_fields.get('lastName')]))
+        return {
+            'name': name or default_fields.get('company') or emails[:1] and emails[0] or contact['id'],
+            'company_name': default_fields.get('company') or False,
+            'function': default_fields.get('role') or False,
+            'email': emails[0] if emails else False,
+            'phone': phones[0] if phones else False,
+        }
+
+    def _link_contacts_by_phone_or_email(self, values_by_contact):
+        """
+        Link OpenPhone contacts to the existing partners without contact ID
+        having the same normalized phone or email, in one query. Takes the
+        partner values of each contact and returns the linked partner of each
+        matched contact.
+        """
+        phones = {normalize_phone_number(values['phone']) for values in values_by_contact.values() if values['phone']}
+        emails = {values['email'].lower() for values in values_by_contact.values() if values['email']}
+        phones.discard(False)
+        if not phones and not emails:
+            return {}
+
+        Partner = self.env['res.partner'].with_context(openphone_sync_origin='openphone', active_test=False)
+        candidates = Partner.search(self.env.company._get_openphone_partner_domain() + [
+            ('openphone_contact_id', '=', False),
+            '|', ('openphone_phone_normalized', 'in', list(phones)), ('email_normalized', 'in', list(emails)),
+        ], order='id')
+        by_phone, by_email = {}, {}
+        for partner in candidates:
+            # Candidates found by email may have no phone, and the other way around
+            if partner.openphone_phone_normalized:
+                by_phone.setdefault(partner.openphone_phone_normalized, partner)
+            if partner.email_normalized:
+                by_email.setdefault(partner.email_normalized, partner)
 
-        if not phone_number or not phone_name:
-            _logger.warning("Phone number or name missing. Skipping: %s", phone_data)
+        linked = {}
+        for contact_id, values in values_by_contact.items():
+            phone = normalize_phone_number(values['phone'])
+            email = (values['email'] or '').lower()
+            partner = (phone and by_phone.get(phone)) or (email and by_email.get(email))
+            if partner and partner not in linked.values():
+                partner.openphone_contact_id = contact_id
+                linked[contact_id] = partner
+        if linked:
+            _logger.info("Linked %d OpenPhone contacts to existing partners", len(linked))
+        return linked
+
+    def _sync_contact_page(self, contacts):
+        """
+        Create or update the partners of one page of OpenPhone contacts.
+        Contacts not linked yet are first matched to the partners with the same
+        phone or email, so that only the unknown ones are created. Contacts
+        whose ``updatedAt`` is not newer than the version already synced (e.g.
+        the echo of our own update) are skipped.
+        """
+        contacts = {contact['id']: contact for contact in contacts if contact.get('id')}
+        if not contacts:
             return
 
-        # Log the phone data to debug
-        _logger.info("Processing phone data: number=%s, name=%s", phone_number, phone_name)
+        # Changes coming from OpenPhone must not be pushed back to it
+        Partner = self.env['res.partner'].with_context(openphone_sync_origin='openphone')
+        partners = {
+            partner.openphone_contact_id: partner
+            for partner in Partner.search([('openphone_contact_id', 'in', list(contacts))])
+        }
+        partners.update(self._link_contacts_by_phone_or_email({
+            contact_id: self._prepare_partner_values_from_contact(contact)
+            for contact_id, contact in contacts.items()
+            if contact_id not in partners
+        }))
+
+        vals_list = []
+        synced = Partner
+        company_values = self.env.company._get_openphone_created_partner_values()
+        for contact_id, contact in contacts.items():
+            updated_at = parse_openphone_datetime(contact.get('updatedAt'))
+            values = dict(self._prepare_partner_values_from_contact(contact), openphone_updated_at=updated_at)
+            partner = partners.get(contact_id)
+            if not partner:
+                vals_list.append(dict(values, openphone_contact_id=contact_id, **company_values))
+                continue
+            if updated_at and partner.openphone_updated_at and updated_at <= partner.openphone_updated_at:
+                continue
+            changed = {name: value for name, value in values.items() if (partner[name] or False) != value}
+            if changed:
+                partner.write(changed)
+                synced |= partner
 
-        # Check if a contact already exists with the same number
-        existing_contact = self.env['res.partner'].search([('phone', '=', formatted_phone_number)], limit=1)
+        if vals_list:
+            synced |= Partner.create(vals_list)
+            _logger.info("Created %d contacts from OpenPhone", len(vals_list))
 
-        if existing_contact:
-            _logger.info("Contact already exists with number: %s", formatted_phone_number)
-        else:
-            # Create new contact in Odoo
-            contact_values = {
-                'name': phone_name,  # Use the name from the phone data
-                'phone': formatted_phone_number,  # Use the formatted phone number
-            }
-            
-            _logger.info("Creating new contact with values: %s", contact_values)
-            
-            new_contact = self.env['res.partner'].create(contact_values)
-            new_contact.message_post(
-                body=_("New contact created with phone number '%s'.") % formatted_phone_number
-            )
+        # Remember the state OpenPhone now has, so that it is not pushed back as a change
+        for partner in synced:
+            partner.openphone_payload_hash = Partner._get_openphone_payload_hash(
+                Partner._prepare_openphone_contact_fields(partner))
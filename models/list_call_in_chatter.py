@@ -2,9 +2,10 @@ from odoo import models, fields, api, _, tools
 from odoo.exceptions import UserError
 import requests
 import logging
-from datetime import datetime
-import urllib.parse
-from markupsafe import Markup
+from concurrent.futures import ThreadPoolExecutor
+
+from ..tools.openphone_client import get_openphone_client
+from ..tools.phone import normalize_phone_number
 
 _logger = logging.getLogger(__name__)
 
@@ -16,185 +17,156 @@ class ResPartner(models.Model):
         Normalize the phone number to remove spaces, dashes, and parentheses,
         and ensure it has a leading '+' for international format.
         """
-        cleaned_phone = ''.join(c for c in phone if c.isdigit() or c == '+')
-        if not cleaned_phone.startswith('+'):
-            cleaned_phone = '+1' + cleaned_phone
-        return cleaned_phone
+        return normalize_phone_number(phone)
 
-    def _fetch_call_recording(self, call_id, headers):
+    def _request_call_recording(self, call_id, headers, client):
         """
-        Fetch the call recording URL for a specific call ID.
+        Ask OpenPhone for the recording URL of a call. Returns None when the call
+        has no recording and raises a requests exception on failure. The ORM is
+        not used so this can run in a worker thread.
         """
         api_url = f"https://api.openphone.com/v1/call-recordings/{call_id}"
-        
-        try:
-            _logger.debug("Fetching call recording for call ID %s", call_id)
-            
-            # Send GET request to OpenPhone API
-            response = requests.get(api_url, headers=headers)
-            
-            # Log the response status code and body
-            _logger.debug("API response status code for call recording request: %s", response.status_code)
-            _logger.debug("API response body for call recording request: %s", response.text)
-            
-            # Raise an error for bad responses (non-200 status codes)
-            response.raise_for_status()
-
-            # Parse the response JSON
-            recording_data = response.json()
-            
-            _logger.debug("Call recording data for call ID %s: %s", call_id, recording_data)
-
-            # Ensure 'data' key exists and contains a list with recordings
-            if 'data' in recording_data and isinstance(recording_data['data'], list) and len(recording_data['data']) > 0:
-                # Access the first recording in the 'data' array
-                recording_info = recording_data['data'][0]
-                
-                _logger.debug("Recording info for call ID %s: %s", call_id, recording_info)
-                
-                # Check if 'url' key is present in the recording info
-                if 'url' in recording_info:
-                    _logger.debug("Recording URL found for call ID %s: %s", call_id, recording_info['url'])
-                    return recording_info['url']
-                else:
-                    _logger.warning("Recording URL not found for call ID %s. Full API response: %s", call_id, recording_data)
-                    return None
-            else:
-                _logger.warning("No recording data found for call ID %s. Full API response: %s", call_id, recording_data)
-                return None
-        except requests.exceptions.RequestException as e:
-            # Log any request exception (like network issues or non-200 responses)
-            _logger.error("Error fetching call recording for call ID %s: %s", call_id, e)
+        _logger.debug("Fetching call recording for call ID %s", call_id)
+
+        # Send GET request to OpenPhone API
+        response = client.get(api_url, headers=headers)
+
+        # Raise an error for bad responses (non-200 status codes)
+        response.raise_for_status()
+
+        # Parse the response JSON
+        recording_data = response.json()
+
+        # Ensure 'data' key exists and contains a list with recordings
+        if 'data' in recording_data and isinstance(recording_data['data'], list) and len(recording_data['data']) > 0:
+            # Access the first recording in the 'data' array
+            recording_info = recording_data['data'][0]
+
+            # Check if 'url' key is present in the recording info
+            if 'url' in recording_info:
+                _logger.debug("Recording URL found for call ID %s: %s", call_id, recording_info['url'])
+                return recording_info['url']
+            _logger.warning("Recording URL not found for call ID %s. Full API response: %s", call_id, recording_data)
             return None
+        _logger.debug("No recording data found for call ID %s", call_id)
+        return None
 
-    def _format_call_log_message(self, call, sanitized_phone, index, headers):
+    def _fetch_call_recording(self, call_id, headers, client=None):
         """
-        Format a single call log into an HTML message for the chatter.
+        Fetch the call recording URL for a specific call ID, through the recording cache.
         """
-        
-        # Log the full JSON data of the call for debugging
-        _logger.debug("Processing call log %d: %s", index, call)
-    
-        direction = tools.html_escape(call.get('direction', 'unknown').capitalize())
-        status = tools.html_escape(call.get('status', 'unknown').capitalize())
-        duration = tools.html_escape(str(call.get('duration', 0)))
-
-        created_at_str = call.get('createdAt')
-        created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
-
-        completed_at_str = call.get('completedAt')
-        completed_at = datetime.fromisoformat(completed_at_str.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
-
-        participants = ', '.join(tools.html_escape(p) for p in call.get('participants', []))
-
-        # Get the call ID from the JSON data
-        call_id = call.get('id')
-        call_id_html = f"<li><b>Call ID:</b> {tools.html_escape(call_id)}</li>" if call_id else "<li><b>Call ID:</b> Not Available</li>"
-
-        # Call recording URL (if available)
-        call_recording_url = None
-        if call_id:
-            call_recording_url = self._fetch_call_recording(call_id, headers)
-
-        # Prepare HTML for the call log message
-        call_recording_html = (
-            f"<li><b>Call Recording:</b> <a href='{tools.html_escape(call_recording_url)}' target='_blank'>Download</a></li>"
-            if call_recording_url else "<li><b>Call Recording:</b> Not Available</li>"
-        )
-
-        # Return the formatted message for the chatter
-        return _(
-            """
-            <b>Call Log %d:</b><br/>
-            <ul>
-                <li><b>Direction:</b> %s</li>
-                <li><b>Status:</b> %s</li>
-                <li><b>Duration:</b> %s seconds</li>
-                <li><b>Participants:</b> %s</li>
-                <li><b>Created At:</b> %s</li>
-                <li><b>Completed At:</b> %s</li>
-                %s
-                %s
-            </ul>
-            """
-        ) % (index, direction, status, duration, participants, created_at, completed_at, call_id_html, call_recording_html)
+        return self._fetch_call_recordings([call_id], headers, client).get(call_id)
 
-    def action_fetch_call_logs(self):
+    def _fetch_call_recordings(self, call_ids, headers, client=None):
         """
-        Button action to fetch call logs for selected partners.
+        Resolve the recording URLs of several calls. Cached answers are served
+        from the recording cache; the others are fetched concurrently and cached.
+        Returns a dict mapping each call ID to its recording URL (or None).
         """
-        api_key = self.env['ir.config_parameter'].sudo().get_param('openphone.api.key', default='')
-        if not api_key:
-            raise UserError(_("OpenPhone API key is not configured."))
-
-        openphone_phone_number_id = "PNultOAaGq"  # Replace with your actual phone number ID.
-        headers = {
-            'Authorization': api_key,
-            'Content-Type': 'application/json',
+        if not call_ids:
+            return {}
+        RecordingCache = self.env['openphone.call.recording'].sudo()
+        recordings = RecordingCache._lookup(call_ids)
+        missing = [call_id for call_id in dict.fromkeys(call_ids) if call_id not in recordings]
+        if not missing:
+            return recordings
+
+        def fetch(call_id):
+            try:
+                return call_id, self._request_call_recording(call_id, headers, client), True
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # Log any request exception (like network issues or non-200 responses)
+                _logger.error("Error fetching call recording for call ID %s: %s", call_id, e)
+                return call_id, None, False
+
+        max_workers = int(self.env['ir.config_parameter'].sudo().get_param('openphone.recording_concurrency', 5))
+        client = client or get_openphone_client(self.env)
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            results = list(executor.map(fetch, missing))
+
+        # Failed lookups are returned as None but not cached
+        RecordingCache._store({call_id: url for call_id, url, ok in results if ok})
+        recordings.update((call_id, url) for call_id, url, _ok in results)
+        return recordings
+
+    @api.model
+    def _prepare_call_log_values(self, call):
+        """
+        Precompute the display values of a stored openphone.call for the
+        call log template. Missed calls have no completion date.
+        """
+        return {
+            'call_id': call.call_id,
+            'direction': (call.direction or 'unknown').capitalize(),
+            'status': (call.status or 'unknown').capitalize(),
+            'duration': call.duration,
+            'participants': call.participants or '',
+            'created_at': call.created_at and call.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'completed_at': call.completed_at and call.completed_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'recording_url': call.recording_url,
         }
 
-        for partner in self:
-            if not partner.phone:
-                partner.message_post(
-                    body=_("No phone number is defined for this partner."),
-                    subject=_("Call Logs Fetching Result"),
-                )
-                continue
-
-            sanitized_phone = self._normalize_phone_number(partner.phone)
-            encoded_phone = urllib.parse.quote(sanitized_phone)
-            api_url = (
-                f"https://api.openphone.com/v1/calls"
-                f"?phoneNumberId={openphone_phone_number_id}"
-                f"&participants={encoded_phone}"
-                f"&maxResults=10"
-            )
-
-            _logger.debug("Fetching call logs for partner %s. API URL: %s", partner.name, api_url)
+    def _log_call_fetch_results(self, bodies):
+        """Log the fetch result notes of several partners in one batch; plain text bodies are escaped."""
+        if bodies:
+            self.browse(bodies)._message_log_batch(bodies={
+                partner_id: tools.html_escape(body) for partner_id, body in bodies.items()
+            })
 
+    def action_fetch_call_logs(self):
+        """
+        Button action to fetch call logs for selected partners.
+        """
+        client = get_openphone_client(self.env)
+
+        # Sync the new calls of every partner first, so that all recordings
+        # can be resolved concurrently before rendering. The result notes are
+        # collected and logged in one batch at the end.
+        bodies = {}
+        partners = self.filtered('openphone_phone_normalized')
+        for partner in self - partners:
+            bodies[partner.id] = _("No phone number is defined for this partner.")
+
+        Call = self.env['openphone.call'].sudo()
+        partner_calls = {}
+        # Each company has its own OpenPhone workspace, API key and rate limit
+        for company, company_partners in partners._group_by_openphone_company().items():
+            headers = company._get_openphone_headers()
             try:
-                response = requests.get(api_url, headers=headers)
-                _logger.debug("API response status code for call logs: %s", response.status_code)
-                _logger.debug("API response body for call logs: %s", response.text)
-                response.raise_for_status()
-                call_logs = response.json().get('data', [])
-
-                if not call_logs:
-                    partner.message_post(
-                        body=_("No call logs found for this partner."),
-                        subject=_("Call Logs Fetching Result"),
-                    )
-                    continue
-
-                messages = [
-                    self._format_call_log_message(call, sanitized_phone, index + 1, headers)
-                    for index, call in enumerate(call_logs)
-                    if sanitized_phone in call.get('participants', [])
-                ]
-
-                if messages:
-                    partner.message_post(
-                        body=Markup('<br/>'.join(messages)),
-                        subject=_("Fetched Call Logs"),
-                        subtype_id=self.env.ref('mail.mt_note').id,
-                    )
-                else:
-                    partner.message_post(
-                        body=_("No call logs match the partner's phone number."),
-                        subject=_("Call Logs Fetching Result"),
-                    )
-            except requests.exceptions.RequestException as e:
-                _logger.error("Error fetching call logs for partner %s: %s", partner.name, e)
-                partner.message_post(
-                    body=_("Error fetching call logs: %s") % tools.html_escape(str(e)),
-                    subject=_("Call Logs Fetching Error"),
-                )
-            except ValueError as e:
-                _logger.error("Error parsing API response for partner %s: %s", partner.name, e)
-                partner.message_post(
-                    body=_("Error parsing API response: %s") % tools.html_escape(str(e)),
-                    subject=_("Call Logs Fetching Error"),
-                )
+                phone_number_ids = Call._get_phone_number_ids(headers)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                _logger.error("Error fetching OpenPhone phone numbers: %s", e)
+                raise UserError(_("Error fetching OpenPhone phone numbers: %s", str(e)))
+
+            company_calls = Call
+            for partner in company_partners:
+                try:
+                    # Only calls created since the last fetch are transferred and stored
+                    new_calls = Call._sync_partner_calls(partner, client, headers, phone_number_ids).get(partner)
+
+                    if new_calls:
+                        partner_calls[partner] = new_calls
+                        company_calls |= new_calls
+                    else:
+                        bodies[partner.id] = _("No new call logs found for this partner.")
+                except requests.exceptions.RequestException as e:
+                    _logger.error("Error fetching call logs for partner %s: %s", partner.name, e)
+                    bodies[partner.id] = _("Error fetching call logs: %s", str(e))
+                except ValueError as e:
+                    _logger.error("Error parsing API response for partner %s: %s", partner.name, e)
+                    bodies[partner.id] = _("Error parsing API response: %s", str(e))
+
+            recordings = self._fetch_call_recordings(company_calls.mapped('call_id'), headers, client)
+            company_calls.filtered(lambda call: recordings.get(call.call_id)).has_recording = True
+
+        # The template is compiled once and cached by ir.qweb
+        QWeb = self.env['ir.qweb']
+        template = f"{self.env['openphone.call']._original_module}.call_log_message"
+        for partner, calls in partner_calls.items():
+            bodies[partner.id] = QWeb._render(template, {
+                'calls': [self._prepare_call_log_values(call) for call in calls],
+            })
+        self._log_call_fetch_results(bodies)
 
         return {
             'type': 'ir.actions.client',
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import requests
+from odoo import models, fields, api
+
+from ..tools.cache import TTLCache
+from ..tools.openphone_client import api_key_fingerprint, get_openphone_client
+from ..tools.phone import normalize_phone_number
+
+_logger = logging.getLogger(__name__)
+
+# Workspace phone number IDs per database and API key; the list rarely changes
+_phone_number_ids_cache = TTLCache(maxsize=64)
+PHONE_NUMBER_IDS_TTL = 600
+
+def parse_openphone_datetime(value):
+    """Convert an OpenPhone ISO 8601 timestamp to a naive UTC datetime (or False)."""
+    if not value:
+        return False
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(timezone.utc).replace(tzinfo=None)
+
+def format_openphone_datetime(value):
+    """Convert a naive UTC datetime to the ISO 8601 format expected by OpenPhone."""
+    return value.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+class OpenPhoneCall(models.Model):
+    _name = 'openphone.call'
+    _description = 'OpenPhone Call'
+    _order = 'created_at desc, id desc'
+    _rec_name = 'call_id'
+
+    call_id = fields.Char(string="Call ID", required=True, index=True, readonly=True)
+    partner_id = fields.Many2one('res.partner', string="Partner", index=True, ondelete='cascade')
+    phone_number_id = fields.Char(string="OpenPhone Number ID", index=True, readonly=True)
+    participant = fields.Char(string="Participant Number", index=True, readonly=True)
+    participants = fields.Char(string="Participants", readonly=True)
+    direction = fields.Selection([
+        ('incoming', 'Incoming'),
+        ('outgoing', 'Outgoing'),
+    ], string="Direction", index=True, readonly=True)
+    status = fields.Char(string="Status", index=True, readonly=True)
+    duration = fields.Integer(string="Duration (s)", readonly=True)
+    created_at = fields.Datetime(string="Created At", index=True, readonly=True)
+    completed_at = fields.Datetime(string="Completed At", readonly=True)
+    has_recording = fields.Boolean(string="Has Recording", readonly=True)
+    recording_url = fields.Char(string="Recording URL", compute='_compute_recording_url',
+                                help="Recording URLs signed by OpenPhone expire; this link resolves a fresh one.")
+
+    _sql_constraints = [
+        ('call_id_unique', 'unique(call_id)', 'An OpenPhone call can only be stored once.'),
+    ]
+
+    @api.depends('has_recording')
+    def _compute_recording_url(self):
+        for call in self:
+            call.recording_url = call.has_recording and call.id and f'/openphone/call/{call.id}/recording'
+
+    def _get_recording_url(self):
+        """Resolve the current signed URL of the call's recording, through the recording cache."""
+        self.ensure_one()
+        if not self.has_recording:
+            return None
+        company = self.partner_id._get_openphone_company() if self.partner_id \
+            else self.env['res.company']._get_openphone_shared_company()
+        return self.env['res.partner']._fetch_call_recording(self.call_id, company._get_openphone_headers())
+
+    @api.model
+    def _prepare_call_values(self, call, phone_number_id, participant, partner):
+        """Map an OpenPhone call payload to openphone.call values."""
+        direction = call.get('direction')
+        return {
+            'call_id': call['id'],
+            'partner_id': partner.id if partner else False,
+            'phone_number_id': call.get('phoneNumberId') or phone_number_id,
+            'participant': participant,
+            'participants': ', '.join(call.get('participants', [])),
+            'direction': direction if direction in ('incoming', 'outgoing') else False,
+            'status': call.get('status'),
+            'duration': call.get('duration') or 0,
+            'created_at': parse_openphone_datetime(call.get('createdAt')),
+            'completed_at': parse_openphone_datetime(call.get('completedAt')),
+        }
+
+    @api.model
+    def _sync_calls(self, phone_number_id, participant, partner, client, headers, page_size=100):
+        """
+        Fetch the calls between an OpenPhone number and a participant created
+        since the last sync, store them and return the new records. The high-water
+        mark only moves once all pages were read, so an interrupted sync restarts
+        from the previous one.
+        """
+        cursor = self.env['openphone.call.cursor']._get_cursor(phone_number_id, participant)
+        params = {
+            'phoneNumberId': phone_number_id,
+            'participants': participant,
+            'maxResults': page_size,
+        }
+        if cursor.last_created_at:
+            params['createdAfter'] = format_openphone_datetime(cursor.last_created_at)
+
+        calls = {}
+        while True:
+            response = client.get("https://api.openphone.com/v1/calls", headers=headers, params=params)
+            response.raise_for_status()
+            payload = response.json()
+            for call in payload.get('data', []):
+                if call.get('id') and participant in call.get('participants', []):
+                    calls[call['id']] = call
+            page_token = payload.get('nextPageToken')
+            if not page_token:
+                break
+            params['pageToken'] = page_token
+
+        known = set(self.search([('call_id', 'in', list(calls))]).mapped('call_id')) if calls else set()
+        new_calls = self.create([
+            self._prepare_call_values(call, phone_number_id, participant, partner)
+            for call_id, call in calls.items()
+            if call_id not in known
+        ])
+
+        last_created_at = max(filter(None, new_calls.mapped('created_at')), default=False)
+        if last_created_at and (not cursor.last_created_at or last_created_at > cursor.last_created_at):
+            cursor.last_created_at = last_created_at
+        return new_calls
+
+    @api.model
+    def _get_phone_number_ids(self, headers):
+        """Return the IDs of all the OpenPhone numbers of the workspace of the API key in ``headers``."""
+        cache_key = (self.env.cr.dbname, api_key_fingerprint(headers.get('Authorization')))
+        hit, phone_number_ids = _phone_number_ids_cache.get(cache_key)
+        if not hit:
+            phone_number_ids = [
+                phone_data['id']
+                for page, _token in self.env['openphone.contact.sync']._iter_pages(
+                    "https://api.openphone.com/v1/phone-numbers", headers)
+                for phone_data in page
+                if phone_data.get('id')
+            ]
+            _phone_number_ids_cache.set(cache_key, phone_number_ids, PHONE_NUMBER_IDS_TTL)
+        return phone_number_ids
+
+    @api.model
+    def _sync_partner_calls(self, partners, client, headers, phone_number_ids=None):
+        """
+        Sync the new calls of each partner on every workspace number.
+        Returns a dict mapping the partners having new calls to those calls.
+        """
+        if phone_number_ids is None:
+            phone_number_ids = self._get_phone_number_ids(headers)
+        new_calls_by_partner = {}
+        for partner in partners:
+            participant = partner.openphone_phone_normalized
+            if not participant:
+                continue
+            new_calls = self.browse()
+            for phone_number_id in phone_number_ids:
+                new_calls |= self._sync_calls(phone_number_id, participant, partner, client, headers)
+            if new_calls:
+                new_calls_by_partner[partner] = new_calls
+        return new_calls_by_partner
+
+    @api.model
+    def _get_active_conversations(self, limit, exclude_ids=()):
+        """
+        Conversations of active partners with activity since their calls were
+        last synced. OpenPhone keeps one conversation per workspace number and
+        participant, calls included; their activity is kept up to date by the
+        message sync and the webhooks.
+        """
+        Conversation = self.env['openphone.conversation']
+        Conversation.flush_model(['partner_id', 'phone_number_id', 'participant', 'last_activity_at'])
+        self.env['openphone.call.cursor'].flush_model(['phone_number_id', 'participant', 'synced_at'])
+        self.env.cr.execute("""
+            SELECT conversation.id
+              FROM openphone_conversation conversation
+              JOIN res_partner partner ON partner.id = conversation.partner_id AND partner.active
+         LEFT JOIN openphone_call_cursor cursor
+                ON cursor.phone_number_id = conversation.phone_number_id
+               AND cursor.participant = conversation.participant
+             WHERE conversation.last_activity_at IS NOT NULL
+               AND (cursor.synced_at IS NULL OR cursor.synced_at < conversation.last_activity_at)
+               AND conversation.id != ALL(%s::int[])
+          ORDER BY conversation.last_activity_at, conversation.id
+             LIMIT %s
+        """, [list(exclude_ids), limit])
+        return Conversation.browse(row[0] for row in self.env.cr.fetchall())
+
+    @api.model
+    def _cron_sync_call_history(self, chunk_size=50):
+        """
+        Sync the calls of the (workspace number, partner) pairs having activity
+        since their last sync, in chunks committed one by one, until the time
+        budget is spent.
+
+        OpenPhone only lists calls for given participants, so calls are polled
+        per pair; inactive pairs and archived partners are skipped instead of
+        polling every partner on every number. Calls are also pushed by the
+        ``call.completed`` webhook, this cron catches up on the missed ones.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        time_budget = int(ICP.get_param('openphone.call_sync.time_budget', 90))
+        deadline = time.monotonic() + time_budget
+        client = get_openphone_client(self.env)
+        Cursor = self.env['openphone.call.cursor']
+
+        done = 0
+        skipped = []
+        while time.monotonic() < deadline:
+            conversations = self._get_active_conversations(chunk_size, skipped)
+            if not conversations:
+                break
+            by_company = defaultdict(lambda: self.env['openphone.conversation'])
+            shared_company = self.env['res.company']._get_openphone_shared_company()
+            for conversation in conversations:
+                by_company[conversation.partner_id._get_openphone_company(shared_company)] |= conversation
+
+            # Each company has its own OpenPhone workspace, API key and rate limit
+            for company, company_conversations in by_company.items():
+                if not company._get_openphone_api_key():
+                    skipped += company_conversations.ids
+                    continue
+                headers = company._get_openphone_headers()
+                phone_number_ids = set(self._get_phone_number_ids(headers))
+                count = 0
+                for conversation in company_conversations:
+                    if conversation.phone_number_id not in phone_number_ids:
+                        # Number of another workspace
+                        skipped.append(conversation.id)
+                        continue
+                    try:
+                        count += len(self._sync_calls(conversation.phone_number_id, conversation.participant,
+                                                      conversation.partner_id, client, headers))
+                    except (requests.exceptions.RequestException, ValueError) as e:
+                        _logger.error("Error syncing the OpenPhone calls of %s: %s", conversation.participant, e)
+                        skipped.append(conversation.id)
+                        continue
+                    Cursor._get_cursor(conversation.phone_number_id, conversation.participant).synced_at = \
+                        conversation.last_activity_at
+                _logger.info("Synced %d new OpenPhone calls in %d conversations of %s",
+                             count, len(company_conversations), company.name)
+            done += len(conversations)
+            self.env.cr.commit()
+            self.env.invalidate_all()
+
+        remaining = len(self._get_active_conversations(1, skipped))
+        self.env['ir.cron']._notify_progress(done=done, remaining=remaining)
+
+    @api.model
+    def _store_webhook_call(self, call, has_recording=False):
+        """Create or update a call pushed by an OpenPhone webhook."""
+        if not call.get('id'):
+            return self.browse()
+        numbers = [number for number in map(normalize_phone_number, call.get('participants', [])) if number]
+        partner = self.env['res.partner']
+        if numbers:
+            partner = partner.search([('openphone_phone_normalized', 'in', numbers)], limit=1)
+        participant = partner.openphone_phone_normalized if partner else (numbers[0] if numbers else False)
+
+        values = self._prepare_call_values(call, call.get('phoneNumberId'), participant, partner)
+        if has_recording:
+            values['has_recording'] = True
+        record = self.search([('call_id', '=', call['id'])], limit=1)
+        if record:
+            values.pop('call_id')
+            record.write(values)
+            return record
+        return self.create(values)
+
+class OpenPhoneCallCursor(models.Model):
+    _name = 'openphone.call.cursor'
+    _description = 'OpenPhone Call Sync High-Water Mark'
+    _rec_name = 'participant'
+
+    phone_number_id = fields.Char(string="OpenPhone Number ID", required=True, index=True)
+    participant = fields.Char(string="Participant Number", required=True)
+    last_created_at = fields.Datetime(string="Last Call Created At")
+    synced_at = fields.Datetime(string="Synced Activity",
+                                help="Conversation activity date up to which the calls were synced.")
+
+    _sql_constraints = [
+        ('phone_participant_unique', 'unique(phone_number_id, participant)',
+         'Only one call sync cursor per OpenPhone number and participant.'),
+    ]
+
+    @api.model
+    def _get_cursor(self, phone_number_id, participant):
+        cursor = self.search([('phone_number_id', '=', phone_number_id), ('participant', '=', participant)], limit=1)
+        return cursor or self.create({'phone_number_id': phone_number_id, 'participant': participant})
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+from odoo import models, fields, api
+
+from ..tools.cache import TTLCache
+
+_logger = logging.getLogger(__name__)
+
+# Recording URLs are signed and expire, so entries are refreshed after a TTL.
+# "No recording" answers are cached too, with a shorter TTL as one may still appear.
+DEFAULT_TTL = 3600
+DEFAULT_NEGATIVE_TTL = 300
+
+# In-process LRU in front of the persisted cache, keyed by (database, call ID)
+_recording_cache = TTLCache(maxsize=4096)
+
+class OpenPhoneCallRecording(models.Model):
+    _name = 'openphone.call.recording'
+    _description = 'OpenPhone Call Recording Cache'
+    _rec_name = 'call_id'
+
+    call_id = fields.Char(string="Call ID", required=True, index=True)
+    url = fields.Char(string="Recording URL", help="Empty when the call has no recording.")
+    expires_at = fields.Datetime(string="Expires At", required=True, index=True)
+
+    _sql_constraints = [
+        ('call_id_unique', 'unique(call_id)', 'A call recording can only be cached once.'),
+    ]
+
+    @api.model
+    def _get_ttls(self):
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        return (int(get_param('openphone.recording_cache_ttl', DEFAULT_TTL)),
+                int(get_param('openphone.recording_cache_negative_ttl', DEFAULT_NEGATIVE_TTL)))
+
+    @api.model
+    def _lookup(self, call_ids):
+        """
+        Return the cached recording URLs (None for calls known to have no
+        recording) of the given calls; expired and unknown calls are omitted.
+        """
+        dbname = self.env.cr.dbname
+        found, missing = {}, []
+        for call_id in call_ids:
+            hit, url = _recording_cache.get((dbname, call_id))
+            if hit:
+                found[call_id] = url
+            else:
+                missing.append(call_id)
+
+        if missing:
+            now = fields.Datetime.now()
+            for record in self.search([('call_id', 'in', missing), ('expires_at', '>', now)]):
+                found[record.call_id] = record.url or None
+                ttl = (record.expires_at - now).total_seconds()
+                _recording_cache.set((dbname, record.call_id), record.url or None, ttl)
+        return found
+
+    @api.model
+    def _store(self, urls):
+        """Cache a mapping of call IDs to recording URLs (None meaning no recording)."""
+        if not urls:
+            return
+        dbname = self.env.cr.dbname
+        ttl, negative_ttl = self._get_ttls()
+        now = fields.Datetime.now()
+
+        records = {record.call_id: record for record in self.search([('call_id', 'in', list(urls))])}
+        vals_list = []
+        for call_id, url in urls.items():
+            entry_ttl = ttl if url else negative_ttl
+            values = {'url': url or False, 'expires_at': now + timedelta(seconds=entry_ttl)}
+            _recording_cache.set((dbname, call_id), url or None, entry_ttl)
+            if call_id in records:
+                records[call_id].write(values)
+            else:
+                vals_list.append(dict(values, call_id=call_id))
+        self.create(vals_list)
+
+    @api.autovacuum
+    def _gc_expired_recordings(self):
+        """Remove cache entries that expired more than a day ago."""
+        self.search([('expires_at', '<', fields.Datetime.now() - timedelta(days=1))]).unlink()
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+from odoo import models, fields, api, tools
+
+from ..tools.openphone_client import get_openphone_client
+from ..tools.phone import normalize_phone_number
+from .openphone_call import parse_openphone_datetime, format_openphone_datetime
+
+_logger = logging.getLogger(__name__)
+
+class OpenPhoneConversation(models.Model):
+    _name = 'openphone.conversation'
+    _description = 'OpenPhone Conversation'
+    _order = 'last_activity_at desc, id desc'
+    _rec_name = 'participant'
+
+    conversation_id = fields.Char(string="Conversation ID", index=True, readonly=True)
+    phone_number_id = fields.Char(string="OpenPhone Number ID", required=True, index=True, readonly=True)
+    participant = fields.Char(string="Participant Number", required=True, index=True, readonly=True)
+    partner_id = fields.Many2one('res.partner', string="Partner", index=True, ondelete='set null')
+    last_activity_at = fields.Datetime(string="Last Activity", index=True, readonly=True)
+    last_created_at = fields.Datetime(string="Last Message Created At", readonly=True,
+                                      help="High-water mark of the messages synced for this conversation.")
+    message_ids = fields.One2many('openphone.message', 'conversation_id', string="Messages")
+
+    _sql_constraints = [
+        ('phone_participant_unique', 'unique(phone_number_id, participant)',
+         'Only one conversation per OpenPhone number and participant.'),
+    ]
+
+    @api.model
+    def _get_conversations(self, keys):
+        """
+        Return the conversations of the given (phone number ID, participant)
+        pairs, creating the missing ones in one batch. Conversations are linked
+        to the partner having the participant's number, also when the partner
+        was created after the conversation.
+        """
+        keys = {key for key in keys if all(key)}
+        if not keys:
+            return {}
+        conversations = {
+            (conversation.phone_number_id, conversation.participant): conversation
+            for conversation in self.search([
+                ('phone_number_id', 'in', list({phone_number_id for phone_number_id, _participant in keys})),
+                ('participant', 'in', list({participant for _phone_number_id, participant in keys})),
+            ])
+            if (conversation.phone_number_id, conversation.participant) in keys
+        }
+        missing = keys - set(conversations)
+        unlinked = {key for key, conversation in conversations.items() if not conversation.partner_id}
+        partners = {}
+        if missing or unlinked:
+            partners = {
+                partner.openphone_phone_normalized: partner.id
+                for partner in self.env['res.partner'].search(
+                    [('openphone_phone_normalized', 'in', list({participant for _id, participant in missing | unlinked}))])
+            }
+        for key in unlinked:
+            if partners.get(key[1]):
+                conversations[key].partner_id = partners[key[1]]
+        if missing:
+            created = self.create([{
+                'phone_number_id': phone_number_id,
+                'participant': participant,
+                'partner_id': partners.get(participant, False),
+            } for phone_number_id, participant in missing])
+            conversations.update(((conversation.phone_number_id, conversation.participant), conversation)
+                                 for conversation in created)
+        return conversations
+
+    def _sync_messages(self, client, headers, page_size=100):
+        """
+        Fetch the messages of the conversation created since the last sync and
+        insert them page by page. The high-water mark only moves once all pages
+        were read; messages already stored are skipped, so an interrupted sync
+        can safely restart from the previous one. Returns the number of new messages.
+        """
+        self.ensure_one()
+        Message = self.env['openphone.message']
+        params = {
+            'phoneNumberId': self.phone_number_id,
+            'participants': self.participant,
+            'maxResults': page_size,
+        }
+        if self.last_created_at:
+            params['createdAfter'] = format_openphone_datetime(self.last_created_at)
+
+        count = 0
+        last_created_at = self.last_created_at
+        while True:
+            response = client.get("https://api.openphone.com/v1/messages", headers=headers, params=params)
+            response.raise_for_status()
+            payload = response.json()
+            new_messages = Message._store_messages(self, payload.get('data', []))
+            count += len(new_messages)
+            last_created_at = max(filter(None, new_messages.mapped('created_at') + [last_created_at]), default=False)
+            page_token = payload.get('nextPageToken')
+            if not page_token:
+                break
+            params['pageToken'] = page_token
+
+        if last_created_at != self.last_created_at:
+            self.last_created_at = last_created_at
+        return count
+
+    @api.model
+    def _sync_conversation_page(self, conversations, client, headers):
+        """
+        Store one page of OpenPhone conversations and sync the messages of
+        those with activity since their last sync.
+        """
+        by_key = {}
+        for conversation in conversations:
+            numbers = [number for number in map(normalize_phone_number, conversation.get('participants') or []) if number]
+            if conversation.get('phoneNumberId') and numbers:
+                by_key[(conversation['phoneNumberId'], numbers[0])] = conversation
+
+        records = self._get_conversations(by_key)
+        count = 0
+        for key, data in by_key.items():
+            record = records[key]
+            last_activity_at = parse_openphone_datetime(data.get('lastActivityAt') or data.get('updatedAt'))
+            if data.get('id') and record.conversation_id != data['id']:
+                record.conversation_id = data['id']
+            if last_activity_at and record.last_activity_at != last_activity_at:
+                record.last_activity_at = last_activity_at
+            if not record.last_created_at or not last_activity_at or last_activity_at > record.last_created_at:
+                count += record._sync_messages(client, headers)
+        return count
+
+    @api.model
+    def _cron_sync_messages(self, page_size=100):
+        """
+        Sync the messages of the conversations active since the last run, for
+        every OpenPhone workspace. Conversations are streamed page by page and
+        committed one page at a time; once the time budget is spent the next
+        run resumes from the page token stored on the workspace's sync cursor.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        time_budget = int(ICP.get_param('openphone.message_sync.time_budget', 90))
+        deadline = time.monotonic() + time_budget
+        client = get_openphone_client(self.env)
+        Sync = self.env['openphone.contact.sync']
+        Cursor = self.env['openphone.sync.cursor'].sudo()
+        done = 0
+
+        for company in self.env['res.company']._get_openphone_workspace_companies():
+            headers = company._get_openphone_headers()
+            cursor = Cursor._get_cursor('messages', company)
+
+            # The run date becomes the lower bound of the next run once all pages are read
+            started_at = cursor.started_at or fields.Datetime.now()
+            cursor.started_at = started_at
+            params = {}
+            if cursor.synced_until:
+                params['updatedAfter'] = format_openphone_datetime(cursor.synced_until)
+
+            complete = False
+            for conversations, next_page_token in Sync._iter_pages(
+                    "https://api.openphone.com/v1/conversations", headers, cursor.page_token or None, page_size,
+                    params=params):
+                count = self.with_company(company)._sync_conversation_page(conversations, client, headers)
+                _logger.info("Synced %d new OpenPhone messages in %d conversations of %s",
+                             count, len(conversations), company.name)
+                done += len(conversations)
+                cursor.page_token = next_page_token or False
+                self.env.cr.commit()
+                self.env.invalidate_all()
+                if not next_page_token:
+                    complete = True
+                elif time.monotonic() >= deadline:
+                    break
+
+            if complete:
+                cursor.write({'synced_until': started_at, 'started_at': False})
+                self.env.cr.commit()
+            if time.monotonic() >= deadline:
+                # More pages or workspaces to go: have the cron run again right away
+                self.env['ir.cron']._notify_progress(done=done, remaining=1)
+                return
+        self.env['ir.cron']._notify_progress(done=done, remaining=0)
+
+class OpenPhoneMessage(models.Model):
+    _name = 'openphone.message'
+    _description = 'OpenPhone Message'
+    _order = 'created_at desc, id desc'
+    _rec_name = 'message_id'
+
+    message_id = fields.Char(string="Message ID", required=True, readonly=True)
+    conversation_id = fields.Many2one('openphone.conversation', string="Conversation", required=True,
+                                      index=True, ondelete='cascade', readonly=True)
+    partner_id = fields.Many2one(related='conversation_id.partner_id', store=True, index=True)
+    phone_number_id = fields.Char(related='conversation_id.phone_number_id')
+    participant = fields.Char(related='conversation_id.participant')
+    direction = fields.Selection([
+        ('incoming', 'Incoming'),
+        ('outgoing', 'Outgoing'),
+    ], string="Direction", readonly=True)
+    body = fields.Text(string="Message", readonly=True)
+    status = fields.Char(string="Status", readonly=True)
+    created_at = fields.Datetime(string="Created At", index=True, readonly=True)
+
+    _sql_constraints = [
+        ('message_id_unique', 'unique(message_id)', 'An OpenPhone message can only be stored once.'),
+    ]
+
+    def init(self):
+        # Paginated per-partner and per-conversation listings, newest first
+        tools.create_index(self.env.cr, 'openphone_message_partner_created_at_index',
+                           self._table, ['partner_id', 'created_at DESC', 'id DESC'])
+        tools.create_index(self.env.cr, 'openphone_message_conversation_created_at_index',
+                           self._table, ['conversation_id', 'created_at DESC', 'id DESC'])
+
+    @api.model
+    def _prepare_message_values(self, conversation, message):
+        """Map an OpenPhone message payload to openphone.message values."""
+        direction = message.get('direction')
+        return {
+            'message_id': message['id'],
+            'conversation_id': conversation.id,
+            'direction': direction if direction in ('incoming', 'outgoing') else False,
+            # The API calls it text, webhooks body
+            'body': message.get('text') or message.get('body') or '',
+            'status': message.get('status'),
+            'created_at': parse_openphone_datetime(message.get('createdAt')),
+        }
+
+    @api.model
+    def _store_messages(self, conversation, messages):
+        """Insert the given messages of a conversation in one batch, skipping the known ones."""
+        messages = {message['id']: message for message in messages if message.get('id')}
+        if not messages:
+            return self.browse()
+        known = set(self.search([('message_id', 'in', list(messages))]).mapped('message_id'))
+        return self.create([
+            self._prepare_message_values(conversation, message)
+            for message_id, message in messages.items()
+            if message_id not in known
+        ])
+
+    @api.model
+    def _store_webhook_message(self, message):
+        """Store a message pushed by an OpenPhone webhook."""
+        if not message.get('id') or not message.get('phoneNumberId'):
+            return self.browse()
+        if message.get('direction') == 'outgoing':
+            to = message.get('to')
+            number = (to[0] if to else None) if isinstance(to, list) else to
+        else:
+            number = message.get('from')
+        participant = normalize_phone_number(number)
+        if not participant:
+            return self.browse()
+
+        key = (message['phoneNumberId'], participant)
+        conversation = self.env['openphone.conversation']._get_conversations([key])[key]
+        if message.get('conversationId') and not conversation.conversation_id:
+            conversation.conversation_id = message['conversationId']
+        created_at = parse_openphone_datetime(message.get('createdAt'))
+        if created_at and (not conversation.last_activity_at or created_at > conversation.last_activity_at):
+            conversation.last_activity_at = created_at
+        return self._store_messages(conversation, [message])
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+
+class OpenPhoneSyncCursor(models.Model):
+    _name = 'openphone.sync.cursor'
+    _description = 'OpenPhone Sync Resume Point'
+    _rec_name = 'name'
+
+    name = fields.Char(string="Stream", required=True, index=True)
+    company_id = fields.Many2one('res.company', string="Company", required=True, ondelete='cascade')
+    page_token = fields.Char(string="Next Page Token",
+                             help="Page the interrupted sync resumes from.")
+    started_at = fields.Datetime(string="Run Started At",
+                                 help="Start date of the run in progress, kept until all its pages are read.")
+    synced_until = fields.Datetime(string="Synced Until",
+                                   help="Start date of the last complete run, lower bound of the next one.")
+
+    _sql_constraints = [
+        ('name_company_unique', 'unique(name, company_id)',
+         'Only one sync cursor per stream and company.'),
+    ]
+
+    @api.model
+    def _get_cursor(self, name, company):
+        # Resume points are written once per page; unlike system parameters
+        # they do not invalidate the registry caches of every worker
+        cursor = self.search([('name', '=', name), ('company_id', '=', company.id)], limit=1)
+        return cursor or self.create({'name': name, 'company_id': company.id})
@@ -0,0 +1,432 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+from ..tools.openphone_client import cron_time_limit, get_openphone_client, process_rate_limit
+
+_logger = logging.getLogger(__name__)
+
+# Replay backoff of failed jobs: 1 minute doubling up to a day, then dead-lettered
+DEFAULT_RETRY_DELAY = 60
+MAX_RETRY_DELAY = 24 * 3600
+DEFAULT_MAX_ATTEMPTS = 10
+# Creations and updates wait for the partner's edits to settle before being pushed
+DEFAULT_DEBOUNCE = 10
+DEFAULT_DEBOUNCE_MAX_DELAY = 60
+# Share of the cron time limit spent sending requests, the rest being a safety margin
+CRON_TIME_LIMIT_RATIO = 0.5
+
+class OpenPhoneSyncJob(models.Model):
+    _name = 'openphone.sync.job'
+    _description = 'OpenPhone Outbound Sync Job'
+    _order = 'id'
+
+    partner_id = fields.Many2one('res.partner', string="Partner", ondelete='set null', index=True)
+    partner_name = fields.Char(string="Partner Name")
+    operation = fields.Selection([
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    ], string="Operation", required=True)
+    openphone_contact_id = fields.Char(string="OpenPhone Contact ID")
+    company_id = fields.Many2one('res.company', string="Company", ondelete='cascade',
+                                 help="Company whose OpenPhone workspace the job is pushed to.")
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('failed', 'Failed'),
+        ('dead', 'Dead Letter'),
+    ], string="State", default='pending', required=True, index=True,
+        help="Failed jobs are replayed automatically with an exponential backoff; "
+             "dead letters exhausted their attempts and are only retried manually.")
+    error = fields.Text(string="Error")
+    attempt_count = fields.Integer(string="Attempts", default=0, readonly=True)
+    next_retry_at = fields.Datetime(string="Next Retry", index=True, readonly=True)
+    payload = fields.Text(string="Payload", readonly=True, help="Body of the last failed request.")
+    scheduled_at = fields.Datetime(string="Scheduled At", index=True, readonly=True,
+                                   help="The job is not pushed before this date, so that successive "
+                                        "edits of the partner are pushed at once.")
+
+    @api.model
+    def _enqueue(self, partners, operation):
+        """
+        Queue an outbound operation for the given partners, coalescing it with
+        the jobs still pending for the same partners:
+
+        - create + create    -> create
+        - create + update(s) -> create (pushed with the final state)
+        - update + update    -> update
+        - create + delete    -> nothing
+        - update + delete    -> delete
+
+        Creations and updates are debounced: they are scheduled
+        ``openphone.sync.debounce`` seconds later, and every further edit
+        postpones them again, up to ``openphone.sync.debounce_max_delay``
+        seconds after the first one. Deletions are pushed right away.
+
+        Jobs being pushed are locked and left alone: the new operation gets its
+        own follow-up job, pushed once the locked one is done. Deletions wait
+        for them instead, so that the contact ID of a creation in flight is
+        known (the transaction is then retried on the serialization failure).
+        """
+        if not partners:
+            return
+        pending = {
+            job.partner_id.id: job
+            for job in self.search([('partner_id', 'in', partners.ids), ('state', '=', 'pending')])._lock_pending(
+                skip_locked=operation != 'delete')
+        }
+
+        ICP = self.env['ir.config_parameter'].sudo()
+        now = fields.Datetime.now()
+        debounce = int(ICP.get_param('openphone.sync.debounce', DEFAULT_DEBOUNCE))
+        max_delay = int(ICP.get_param('openphone.sync.debounce_max_delay', DEFAULT_DEBOUNCE_MAX_DELAY))
+        scheduled_at = now + timedelta(seconds=debounce) if debounce > 0 and operation != 'delete' else False
+
+        vals_list = []
+        to_drop = self.browse()
+        to_postpone = self.browse()
+        to_delete = self.browse()
+        shared_company = self.env['res.company']._get_openphone_shared_company()
+        for partner in partners:
+            job = pending.get(partner.id)
+            if operation in ('create', 'update') and job:
+                if (scheduled_at and job.scheduled_at and job.scheduled_at < scheduled_at
+                        and job.create_date + timedelta(seconds=max_delay) >= scheduled_at):
+                    to_postpone |= job
+                continue
+            if operation == 'create' and partner.openphone_contact_id:
+                continue
+            if operation == 'delete' and job:
+                if job.operation == 'create':
+                    to_drop |= job
+                    continue
+                to_delete |= job
+                company = partner._get_openphone_company(shared_company)
+                if job.openphone_contact_id != partner.openphone_contact_id or job.company_id != company:
+                    # The contact moved since the update was queued
+                    job.write({'openphone_contact_id': partner.openphone_contact_id, 'company_id': company.id})
+                continue
+            if operation == 'delete' and not partner.openphone_contact_id:
+                continue
+            vals_list.append({
+                'partner_id': partner.id,
+                'partner_name': partner.name,
+                'operation': operation,
+                'openphone_contact_id': partner.openphone_contact_id,
+                'company_id': partner._get_openphone_company(shared_company).id,
+                'scheduled_at': scheduled_at,
+            })
+
+        to_drop.unlink()
+        if to_postpone:
+            to_postpone.write({'scheduled_at': scheduled_at})
+        if to_delete:
+            to_delete.write({'operation': 'delete', 'scheduled_at': False})
+        if vals_list:
+            self.create(vals_list)
+        if to_postpone or to_delete or vals_list:
+            self._trigger_processing(scheduled_at)
+
+    @api.model
+    def _trigger_processing(self, at=None):
+        """
+        Wake up the queue cron so jobs are pushed as soon as the transaction
+        commits, or at ``at`` for debounced jobs.
+        """
+        cron = self.env.ref(f'{self._original_module}.ir_cron_openphone_sync_job', raise_if_not_found=False)
+        if cron:
+            cron._trigger(at=at or None)
+
+    @api.model
+    def _get_due_domain(self):
+        """Pending jobs whose debounce window has elapsed."""
+        return [
+            ('state', '=', 'pending'),
+            '|', ('scheduled_at', '=', False), ('scheduled_at', '<=', fields.Datetime.now()),
+        ]
+
+    def _lock_pending(self, skip_locked=True):
+        """
+        Lock the pending jobs for the current transaction and return them,
+        skipping the ones already locked by another transaction (being pushed
+        or coalesced), or waiting for them unless ``skip_locked``.
+        """
+        if not self:
+            return self
+        self.flush_recordset(['state'])
+        self.env.cr.execute(f"""
+            SELECT id FROM "{self._table}"
+             WHERE id IN %s AND state = 'pending'
+               FOR UPDATE {'SKIP LOCKED' if skip_locked else ''}
+        """, [tuple(self.ids)])
+        locked = {row[0] for row in self.env.cr.fetchall()}
+        return self.filtered(lambda job: job.id in locked)
+
+    def _claim(self):
+        """
+        Lock the jobs about to be pushed, so that a concurrent cron run or
+        flush does not push them twice. Jobs following an older pending job of
+        the same partner wait for it, e.g. an update for the creation that will
+        provide its contact ID.
+        """
+        if not self:
+            return self
+        self.flush_model(['state', 'partner_id'])
+        self.env.cr.execute(f"""
+            SELECT job.id FROM "{self._table}" job
+             WHERE job.id IN %s AND job.state = 'pending'
+               AND NOT EXISTS (
+                   SELECT 1 FROM "{self._table}" previous
+                    WHERE previous.partner_id = job.partner_id
+                      AND previous.state = 'pending'
+                      AND previous.id < job.id)
+               FOR UPDATE OF job SKIP LOCKED
+        """, [tuple(self.ids)])
+        claimed = {row[0] for row in self.env.cr.fetchall()}
+        return self.filtered(lambda job: job.id in claimed)
+
+    @api.model
+    def _flush(self, partners=None):
+        """
+        Push the pending jobs of the given partners (all of them by default)
+        right away, without waiting for their debounce window. Jobs being
+        pushed by another transaction are left to it.
+        """
+        domain = [('state', '=', 'pending')]
+        if partners is not None:
+            domain.append(('partner_id', 'in', partners.ids))
+        jobs = self.search(domain)
+        # Follow-up jobs are only claimed once the previous job of their partner is done
+        while jobs and jobs._process_jobs():
+            jobs = jobs.exists().filtered(lambda job: job.state == 'pending')
+        return jobs.exists()
+
+    def _prepare_request(self):
+        """Build the HTTP request for this job, or None when there is nothing to push."""
+        self.ensure_one()
+        Partner = self.env['res.partner'].with_context(openphone_sync_origin='openphone')
+
+        if self.operation == 'delete':
+            return Partner._prepare_openphone_delete_request(
+                self.openphone_contact_id, self.partner_name, self.company_id)
+        if not self.partner_id:
+            _logger.info("Partner %s was removed before its OpenPhone %s job ran. Skipping.",
+                         self.partner_name, self.operation)
+            return None
+        if self.operation == 'create' and not self.partner_id.openphone_contact_id:
+            return Partner._prepare_openphone_create_request(self.partner_id, self.company_id)
+        # A creation following the one that was being pushed when it was queued becomes an update
+        if self.partner_id.openphone_contact_id:
+            return Partner._prepare_openphone_update_request(self.partner_id, self.company_id)
+        return None
+
+    def _process_response(self, response, request):
+        """Apply the OpenPhone response of this job to Odoo."""
+        self.ensure_one()
+        Partner = self.env['res.partner'].with_context(openphone_sync_origin='openphone')
+
+        if self.operation == 'delete':
+            Partner._process_openphone_delete_response(self.partner_name, response)
+        elif request['method'] == 'POST':
+            if self.partner_id.exists():
+                Partner._process_openphone_create_response(self.partner_id, response, request.get('json'))
+            else:
+                self._queue_orphan_delete(response)
+        else:
+            Partner._process_openphone_update_response(self.partner_id, response, request.get('json'))
+
+    def _queue_orphan_delete(self, response):
+        """
+        The partner was deleted while its creation was being pushed: queue the
+        deletion of the contact OpenPhone created for it.
+        """
+        self.ensure_one()
+        if response.status_code != 201:
+            return
+        contact_id = (response.json().get('data') or {}).get('id')
+        if not contact_id:
+            return
+        _logger.info("Partner %s was deleted while being created in OpenPhone. Deleting contact %s.",
+                     self.partner_name, contact_id)
+        self.create({
+            'partner_name': self.partner_name,
+            'operation': 'delete',
+            'openphone_contact_id': contact_id,
+            'company_id': self.company_id.id,
+        })
+        self._trigger_processing()
+
+    @api.model
+    def _send_requests(self, requests_by_job):
+        """
+        Send the prepared requests through a bounded thread pool. Threads only
+        do HTTP; everything touching the ORM stays in the cron thread. Each
+        request is throttled by the rate limiter of its workspace's API key.
+        """
+        max_workers = int(self.env['ir.config_parameter'].sudo().get_param('openphone.sync.max_workers', 8))
+        client = get_openphone_client(self.env)
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                job: executor.submit(client.request, **request)
+                for job, request in requests_by_job.items()
+            }
+            for job, future in futures.items():
+                try:
+                    results[job] = future.result()
+                except requests.exceptions.RequestException as e:
+                    results[job] = e
+        return results
+
+    @api.model
+    def _get_cron_batch_size(self, client, batch_size):
+        """
+        Number of jobs the cron can push before its time limit: requests are
+        throttled to this process's share of the rate limit, so a larger batch
+        would be killed and rolled back halfway.
+        """
+        time_limit = cron_time_limit()
+        if not time_limit:
+            return batch_size
+        rate = process_rate_limit(client.rate_limit)
+        return max(1, min(batch_size, int(rate * time_limit * CRON_TIME_LIMIT_RATIO)))
+
+    @api.model
+    def _cron_process_jobs(self, batch_size=200):
+        """
+        Drain a batch of due jobs, sized to fit in the cron time limit. Jobs
+        are pushed by chunks of ``openphone.sync.max_workers`` and committed
+        after each chunk, so the contact IDs of the pushed creations are never
+        lost to a later failure. The cron is re-triggered while jobs are due,
+        and scheduled for the next debounced one.
+        """
+        max_workers = int(self.env['ir.config_parameter'].sudo().get_param('openphone.sync.max_workers', 8))
+        batch_size = self._get_cron_batch_size(get_openphone_client(self.env), batch_size)
+        time_limit = cron_time_limit()
+        deadline = time.monotonic() + time_limit * CRON_TIME_LIMIT_RATIO if time_limit else None
+
+        done = 0
+        skipped = []
+        while done < batch_size and (deadline is None or time.monotonic() < deadline):
+            jobs = self.search(self._get_due_domain() + [('id', 'not in', skipped)],
+                               limit=min(max(1, max_workers), batch_size - done))
+            if not jobs:
+                break
+            claimed = jobs._process_jobs()
+            # Jobs being pushed by another transaction, or waiting for one
+            skipped += (jobs - claimed).ids
+            done += len(claimed)
+            self.env.cr.commit()
+            self.env.invalidate_all()
+
+        remaining = self.search_count(self._get_due_domain())
+        self.env['ir.cron']._notify_progress(done=done, remaining=remaining)
+        if not remaining:
+            next_job = self.search([('state', '=', 'pending'), ('scheduled_at', '!=', False)],
+                                   order='scheduled_at', limit=1)
+            if next_job:
+                self._trigger_processing(next_job.scheduled_at)
+
+    def _process_jobs(self):
+        """
+        Push the jobs to OpenPhone; successful jobs are removed and failed ones
+        kept for replay. Jobs locked by another transaction are skipped, and
+        the claimed ones stay locked until the transaction ends. Returns the
+        claimed jobs.
+        """
+        jobs = self._claim()
+        done = self.browse()
+        failures = {}
+
+        requests_by_job = {}
+        for job in jobs:
+            # A job that cannot be prepared must not block the rest of the queue
+            try:
+                with self.env.cr.savepoint():
+                    request = job._prepare_request()
+            except UserError as e:
+                failures[job] = str(e)
+                continue
+            except Exception as e:
+                _logger.exception("Unexpected error preparing the OpenPhone %s request of partner %s",
+                                  job.operation, job.partner_name)
+                failures[job] = str(e) or repr(e)
+                continue
+            if request:
+                requests_by_job[job] = request
+            else:
+                done |= job
+
+        for job, response in self._send_requests(requests_by_job).items():
+            if isinstance(response, Exception):
+                failures[job] = str(response)
+                continue
+            # A job failing unexpectedly must not roll back the others, whose
+            # requests were sent already
+            try:
+                with self.env.cr.savepoint():
+                    job._process_response(response, requests_by_job[job])
+                done |= job
+            except UserError as e:
+                failures[job] = str(e)
+            except Exception as e:
+                _logger.exception("Unexpected error processing the OpenPhone %s response of partner %s",
+                                  job.operation, job.partner_name)
+                failures[job] = str(e) or repr(e)
+
+        for job, error in failures.items():
+            job._mark_failed(error, requests_by_job.get(job))
+        done.unlink()
+        return jobs
+
+    def _mark_failed(self, error, request=None):
+        """
+        Keep the failed job with its error and payload, and schedule its replay
+        with an exponential backoff. Jobs failing too many times are
+        dead-lettered until retried manually.
+        """
+        self.ensure_one()
+        ICP = self.env['ir.config_parameter'].sudo()
+        max_attempts = int(ICP.get_param('openphone.sync.max_attempts', DEFAULT_MAX_ATTEMPTS))
+        retry_delay = int(ICP.get_param('openphone.sync.retry_delay', DEFAULT_RETRY_DELAY))
+
+        attempt_count = self.attempt_count + 1
+        values = {
+            'attempt_count': attempt_count,
+            'error': error,
+            'payload': json.dumps(request['json'], indent=2) if request and request.get('json') else False,
+        }
+        if attempt_count >= max_attempts:
+            _logger.error("OpenPhone %s job for partner %s dead-lettered after %d attempts: %s",
+                          self.operation, self.partner_name, attempt_count, error)
+            values.update(state='dead', next_retry_at=False)
+        else:
+            delay = min(retry_delay * 2 ** (attempt_count - 1), MAX_RETRY_DELAY)
+            _logger.warning("OpenPhone %s job failed for partner %s (attempt %d, retry in %ds): %s",
+                            self.operation, self.partner_name, attempt_count, delay, error)
+            values.update(state='failed', next_retry_at=fields.Datetime.now() + timedelta(seconds=delay))
+        self.write(values)
+
+    @api.model
+    def _cron_replay_failed_jobs(self):
+        """Put the failed jobs whose backoff has elapsed back in the queue."""
+        jobs = self.search([('state', '=', 'failed'), ('next_retry_at', '<=', fields.Datetime.now())])
+        if jobs:
+            _logger.info("Replaying %d failed OpenPhone sync jobs", len(jobs))
+            jobs.write({'state': 'pending', 'next_retry_at': False})
+            self._trigger_processing()
+
+    def action_retry(self):
+        """Put the selected failed and dead-lettered jobs back in the queue right away."""
+        jobs = self.filtered(lambda job: job.state in ('failed', 'dead'))
+        # Dead letters get a fresh set of attempts
+        jobs.filtered(lambda job: job.state == 'dead').write({'attempt_count': 0})
+        jobs.write({'state': 'pending', 'next_retry_at': False, 'scheduled_at': False})
+        self._trigger_processing()
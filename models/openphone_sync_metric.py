@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from odoo import models, fields, api
+
+from ..tools.metrics import LATENCY_BUCKETS
+from ..tools.openphone_client import flush_metrics
+
+_logger = logging.getLogger(__name__)
+
+class OpenPhoneSyncMetric(models.Model):
+    _name = 'openphone.sync.metric'
+    _description = 'OpenPhone API Metrics'
+    _order = 'date desc, id desc'
+    _rec_name = 'endpoint'
+
+    date = fields.Datetime(string="Date", required=True, index=True, default=fields.Datetime.now)
+    process = fields.Char(string="Process")
+    endpoint = fields.Char(string="Endpoint", required=True, index=True)
+    request_count = fields.Integer(string="Requests", aggregator='sum')
+    error_count = fields.Integer(string="Errors", aggregator='sum')
+    retry_count = fields.Integer(string="Retries", aggregator='sum')
+    bytes_received = fields.Integer(string="Bytes Received", aggregator='sum')
+    latency_total = fields.Float(string="Total Latency (s)", aggregator='sum')
+    latency_max = fields.Float(string="Max Latency (s)", aggregator='max')
+    latency_avg = fields.Float(string="Avg Latency (ms)", compute='_compute_latency_avg')
+    latency_histogram = fields.Json(string="Latency Histogram")
+    status_counts = fields.Json(string="Status Codes")
+
+    @api.depends('latency_total', 'request_count')
+    def _compute_latency_avg(self):
+        for metric in self:
+            metric.latency_avg = metric.latency_total * 1000 / metric.request_count if metric.request_count else 0.0
+
+    @api.model
+    def _store(self, entries, process=None):
+        """Persist the aggregates popped from the in-process metrics."""
+        now = fields.Datetime.now()
+        self.create([{
+            'date': now,
+            'process': process,
+            'endpoint': endpoint,
+            'request_count': entry['requests'],
+            'error_count': entry['errors'],
+            'retry_count': entry['retries'],
+            'bytes_received': entry['bytes'],
+            'latency_total': entry['latency_sum'],
+            'latency_max': entry['latency_max'],
+            'latency_histogram': entry['buckets'],
+            'status_counts': dict(entry['statuses']),
+        } for endpoint, entry in entries.items()])
+
+    @api.model
+    def _cron_flush_metrics(self):
+        """Flush the metrics of the cron process itself."""
+        flush_metrics(self.env)
+
+    @api.model
+    def _get_summary(self, since):
+        """Return the totals recorded since ``since`` over all endpoints."""
+        [(requests, errors, retries, latency_total)] = self._read_group(
+            [('date', '>=', since)], [],
+            ['request_count:sum', 'error_count:sum', 'retry_count:sum', 'latency_total:sum'])
+        return {
+            'requests': requests or 0,
+            'errors': errors or 0,
+            'retries': retries or 0,
+            'latency_avg': (latency_total or 0.0) * 1000 / requests if requests else 0.0,
+        }
+
+    @api.model
+    def _prometheus_text(self):
+        """Render the stored metrics in the Prometheus text exposition format."""
+        totals = defaultdict(lambda: {
+            'requests': 0, 'errors': 0, 'retries': 0, 'bytes': 0, 'latency': 0.0,
+            'buckets': [0] * len(LATENCY_BUCKETS), 'statuses': defaultdict(int),
+        })
+        for metric in self.search_fetch([], ['endpoint', 'request_count', 'error_count', 'retry_count',
+                                             'bytes_received', 'latency_total', 'latency_histogram',
+                                             'status_counts']):
+            total = totals[metric.endpoint]
+            total['requests'] += metric.request_count
+            total['errors'] += metric.error_count
+            total['retries'] += metric.retry_count
+            total['bytes'] += metric.bytes_received
+            total['latency'] += metric.latency_total
+            for index, count in enumerate(metric.latency_histogram or []):
+                total['buckets'][index] += count
+            for status, count in (metric.status_counts or {}).items():
+                total['statuses'][status] += count
+
+        lines = [
+            "# TYPE openphone_requests_total counter",
+            "# TYPE openphone_request_errors_total counter",
+            "# TYPE openphone_request_retries_total counter",
+            "# TYPE openphone_response_bytes_total counter",
+            "# TYPE openphone_responses_total counter",
+            "# TYPE openphone_request_duration_seconds histogram",
+        ]
+        for endpoint, total in sorted(totals.items()):
+            label = 'endpoint="%s"' % endpoint.replace('"', '')
+            lines.append(f"openphone_requests_total{{{label}}} {total['requests']}")
+            lines.append(f"openphone_request_errors_total{{{label}}} {total['errors']}")
+            lines.append(f"openphone_request_retries_total{{{label}}} {total['retries']}")
+            lines.append(f"openphone_response_bytes_total{{{label}}} {total['bytes']}")
+            for status, count in sorted(total['statuses'].items()):
+                lines.append(f'openphone_responses_total{{{label},status="{status}"}} {count}')
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, total['buckets']):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else str(bound)
+                lines.append(f'openphone_request_duration_seconds_bucket{{{label},le="{le}"}} {cumulative}')
+            lines.append(f"openphone_request_duration_seconds_sum{{{label}}} {total['latency']}")
+            lines.append(f"openphone_request_duration_seconds_count{{{label}}} {total['requests']}")
+        return "\n".join(lines) + "\n"
+
+    @api.autovacuum
+    def _gc_old_metrics(self):
+        """Keep 30 days of metrics."""
+        self.search([('date', '<', fields.Datetime.now() - timedelta(days=30))]).unlink()
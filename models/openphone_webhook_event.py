@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+from datetime import timedelta
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+class OpenPhoneWebhookEvent(models.Model):
+    _name = 'openphone.webhook.event'
+    _description = 'OpenPhone Webhook Event'
+    _order = 'id'
+    _rec_name = 'event_id'
+
+    event_id = fields.Char(string="Event ID", required=True, index=True, readonly=True)
+    event_type = fields.Char(string="Event Type", required=True, index=True, readonly=True)
+    payload = fields.Text(string="Payload", readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string="State", default='pending', required=True, index=True)
+    error = fields.Text(string="Error")
+
+    _sql_constraints = [
+        ('event_id_unique', 'unique(event_id)', 'An OpenPhone webhook event can only be received once.'),
+    ]
+
+    @api.model
+    def _enqueue(self, event):
+        """Store a received webhook event, ignoring OpenPhone redeliveries."""
+        if self.search_count([('event_id', '=', event['id'])], limit=1):
+            _logger.debug("OpenPhone webhook event %s already received", event['id'])
+            return self.browse()
+        record = self.create({
+            'event_id': event['id'],
+            'event_type': event['type'],
+            'payload': json.dumps(event),
+        })
+        cron = self.env.ref(f'{self._original_module}.ir_cron_openphone_webhook_event', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+        return record
+
+    @api.model
+    def _cron_process_events(self, batch_size=200):
+        """Apply a batch of pending webhook events; the cron is re-triggered while events remain."""
+        events = self.search([('state', '=', 'pending')], limit=batch_size)
+        for event in events:
+            try:
+                with self.env.cr.savepoint():
+                    event._process()
+                event.state = 'done'
+            except Exception as e:
+                _logger.exception("Failed to process OpenPhone webhook event %s", event.event_id)
+                event.write({'state': 'failed', 'error': str(e)})
+
+        remaining = self.search_count([('state', '=', 'pending')])
+        self.env['ir.cron']._notify_progress(done=len(events), remaining=remaining)
+
+    def _process(self):
+        """Dispatch the event to the handler of its type."""
+        self.ensure_one()
+        data = json.loads(self.payload).get('data', {}).get('object') or {}
+        handler = getattr(self, '_process_' + self.event_type.replace('.', '_'), None)
+        if handler is None:
+            _logger.info("Ignoring unsupported OpenPhone webhook event type %s", self.event_type)
+            return
+        handler(data)
+
+    def _process_call_completed(self, call):
+        self.env['openphone.call']._store_webhook_call(call)
+
+    def _process_call_recording_completed(self, call):
+        media = [item for item in call.get('media') or [] if item.get('url')]
+        recording_url = media[0]['url'] if media else None
+        self.env['openphone.call']._store_webhook_call(call, has_recording=bool(recording_url))
+        if call.get('id') and recording_url:
+            self.env['openphone.call.recording']._store({call['id']: recording_url})
+
+    def _process_contact_updated(self, contact):
+        self.env['openphone.contact.sync']._sync_contact_page([contact])
+
+    def _process_message_received(self, message):
+        if not self.env['openphone.message']._store_webhook_message(message):
+            _logger.info("Ignoring OpenPhone message %s from %s", message.get('id'), message.get('from'))
+
+    def _process_message_delivered(self, message):
+        self._process_message_received(message)
+
+    def action_retry(self):
+        """Put failed events back in the queue."""
+        self.filtered(lambda event: event.state == 'failed').write({'state': 'pending', 'error': False})
+        cron = self.env.ref(f'{self._original_module}.ir_cron_openphone_webhook_event', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    @api.autovacuum
+    def _gc_processed_events(self):
+        """Remove processed events after a week."""
+        self.search([
+            ('state', '=', 'done'),
+            ('write_date', '<', fields.Datetime.now() - timedelta(days=7)),
+        ]).unlink()
@@ -4,77 +4,68 @@ import requests
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from ..tools.openphone_client import get_openphone_client
+
 _logger = logging.getLogger(__name__)
 
 class ResPartner(models.Model):
     _inherit = 'res.partner'
 
-    def _create_openphone_contact(self, partner):
-        """Create a contact in OpenPhone."""
-        # Fetch API key from system parameters
-        api_key = self.env['ir.config_parameter'].sudo().get_param('openphone.api.key', default='')
-        if not api_key:
-            _logger.warning("OpenPhone API key is missing. Please configure it.")
-            raise UserError(_("No OpenPhone API key found. Please configure it in settings."))
+    def _prepare_openphone_create_request(self, partner, company=None):
+        """
+        Build the POST request creating the partner in the OpenPhone workspace
+        of ``company`` (the partner's workspace by default).
+        """
+        # API key of the partner's OpenPhone workspace
+        headers = (company or partner._get_openphone_company())._get_openphone_headers()
 
         api_url = "https://api.openphone.com/v1/contacts"
 
-        # Prepare the data payload
-        data = {
-            "defaultFields": {
-                "firstName": partner.name.split(" ")[0] if partner.name else "",
-                "lastName": " ".join(partner.name.split(" ")[1:]) if len(partner.name.split(" ")) > 1 else "",
-                "company": partner.company_name if partner.company_name else "",
-                "role": partner.function if partner.function else "",
-                "emails": [{"name": "Work email", "value": partner.email}] if partner.email else [],
-                "phoneNumbers": [{"name": "Work phone", "value": partner.phone}] if partner.phone else [],
-            },
-        }
+        # Prepare the data payload; address contacts may have no name
+        data = {"defaultFields": self._prepare_openphone_contact_fields(partner)}
 
-        headers = {
-            "Authorization": api_key,
-            "Content-Type": "application/json"
-        }
+        return {'method': 'POST', 'url': api_url, 'headers': headers, 'json': data}
 
-        # Log debug information
-        _logger.debug("OpenPhone API Key: %s", api_key)
-        _logger.debug("OpenPhone API URL: %s", api_url)
-        _logger.debug("Payload being sent to OpenPhone API: %s", data)
+    def _process_openphone_create_response(self, partner, response, data=None):
+        """Save the OpenPhone contact ID returned for a created partner."""
+        # Check for success
+        if response.status_code == 201:
+            response_data = response.json()
+            contact_id = response_data.get("data", {}).get("id")
+            if contact_id:
+                partner.with_context(openphone_sync_origin='openphone').write({
+                    'openphone_contact_id': contact_id,
+                    'openphone_payload_hash': self._get_openphone_payload_hash(data["defaultFields"]) if data else False,
+                    'openphone_updated_at': self._get_openphone_updated_at(response),
+                })
+                _logger.info("Saved OpenPhone Contact ID %s for partner %s", contact_id, partner.name)
+            else:
+                _logger.warning("Contact ID not returned from OpenPhone API for partner %s", partner.name)
+        else:
+            # Log and raise an error for non-successful status codes
+            _logger.error("Failed to create contact in OpenPhone: %s", response.text)
+            # The status and answer are kept on the failed sync job
+            raise UserError(_("Failed to create contact in OpenPhone (HTTP %(status)s): %(error)s",
+                              status=response.status_code, error=response.text[:500]))
 
+    def _create_openphone_contact(self, partner):
+        """Create a contact in OpenPhone."""
+        request = self._prepare_openphone_create_request(partner)
         try:
             # Send POST request to OpenPhone API
-            response = requests.post(api_url, headers=headers, json=data)
-            _logger.debug("OpenPhone API Response Status Code: %s", response.status_code)
-            _logger.debug("OpenPhone API Response Content: %s", response.text)
-
-            # Check for success
-            if response.status_code == 201:
-                response_data = response.json()
-                contact_id = response_data.get("data", {}).get("id")
-                if contact_id:
-                    partner.write({'openphone_contact_id': contact_id})
-                    _logger.info("Saved OpenPhone Contact ID %s for partner %s", contact_id, partner.name)
-                else:
-                    _logger.warning("Contact ID not returned from OpenPhone API for partner %s", partner.name)
-            else:
-                # Log and raise an error for non-successful status codes
-                _logger.error("Failed to create contact in OpenPhone: %s", response.text)
-                raise UserError(_("Failed to create contact in OpenPhone. Check logs for details."))
-            
+            response = get_openphone_client(self.env).request(**request)
         except requests.exceptions.RequestException as e:
             _logger.error("Failed to create contact in OpenPhone: %s", str(e))
-            _logger.error("Response Content: %s", response.text if 'response' in locals() else "No response received")
             raise UserError(_("Failed to create contact in OpenPhone. Check logs for details."))
+        self._process_openphone_create_response(partner, response, request['json'])
 
-    @api.model
-    def create(self, vals):
-        """Override create method to send data to OpenPhone."""
-        partner = super(ResPartner, self).create(vals)
-        _logger.debug("New partner created in Odoo: %s", partner)
-        
-        # Call the function to create contact in OpenPhone
-        try:
-            self._create_openphone_contact(partner)
-        except UserError as e:
-            _logger.warning("Contact creation in OpenPhone failed: %s", str(e))
-        return partner
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create method to queue the new contacts for OpenPhone."""
+        partners = super(ResPartner, self).create(vals_list)
+        _logger.debug("New partners created in Odoo: %s", partners)
+
+        # Queue the contact creation; the sync job cron pushes it to OpenPhone
+        if not self._is_openphone_origin():
+            self.env['openphone.sync.job'].sudo()._enqueue(partners, 'create')
+        return partners
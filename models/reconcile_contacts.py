@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import logging
+import requests
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+from ..tools.phone import normalize_phone_number
+from .openphone_call import parse_openphone_datetime
+
+_logger = logging.getLogger(__name__)
+
+# Partner fields compared with the OpenPhone contact to detect drift
+RECONCILED_FIELDS = ('name', 'company_name', 'function', 'email', 'phone')
+
+class OpenPhoneContactSync(models.Model):
+    _inherit = 'openphone.contact.sync'
+
+    @api.model
+    def _get_reconcile_partner_domain(self):
+        """Partners that are expected to exist in OpenPhone."""
+        return ['|', ('openphone_phone_normalized', '!=', False), ('email', '!=', False)]
+
+    @api.model
+    def _cron_reconcile_contacts(self):
+        """Reconcile the contacts of every OpenPhone workspace."""
+        for company in self.env['res.company']._get_openphone_workspace_companies():
+            self.with_company(company).reconcile_contacts()
+
+    @api.model
+    def reconcile_contacts(self, chunk_size=1000):
+        """
+        Converge OpenPhone contacts and partners after outages or for partners
+        created before the module was installed.
+
+        OpenPhone contacts are streamed page by page and joined to partners on
+        the contact ID, then on the normalized phone or the email. Each page
+        yields part of the diff, which is applied right away:
+
+        - missing local: the contact is created as a partner,
+        - field drift: the side that changed since the last sync wins, local
+          changes being queued as updates,
+        - missing remote: partners never matched by any contact are queued for
+          creation once all pages are read.
+
+        Outbound changes go through the sync job queue, whose cron pushes them
+        with bounded concurrency. Every matched partner is stamped with the run
+        date so an interrupted run resumes from its last page.
+
+        Only the workspace of the current company and its partners are
+        reconciled.
+        """
+        company = self.env.company
+        headers = company._get_openphone_headers()
+
+        cursor = self.env['openphone.sync.cursor'].sudo()._get_cursor('reconcile', company)
+        run_at = cursor.started_at or fields.Datetime.now()
+        cursor.started_at = run_at
+
+        try:
+            self._sync_pages(
+                "https://api.openphone.com/v1/contacts", headers, cursor,
+                lambda contacts: self._reconcile_contact_page(contacts, run_at))
+        except requests.exceptions.RequestException as e:
+            _logger.error("Failed to fetch data from OpenPhone API: %s", str(e))
+            raise UserError(_("Failed to fetch data from OpenPhone API."))
+
+        self._reconcile_missing_remote(run_at, chunk_size)
+        cursor.write({'started_at': False, 'synced_until': run_at})
+        _logger.info("OpenPhone contact reconciliation completed successfully.")
+
+    def _reconcile_contact_page(self, contacts, run_at):
+        """Match one page of OpenPhone contacts to partners and apply the diff."""
+        contacts = {contact['id']: contact for contact in contacts if contact.get('id')}
+        if not contacts:
+            return
+
+        Partner = self.env['res.partner'].with_context(openphone_sync_origin='openphone', active_test=False)
+        matched = {
+            partner.openphone_contact_id: partner
+            for partner in Partner.search([('openphone_contact_id', 'in', list(contacts))])
+        }
+
+        # Link the remaining contacts on normalized phone and email
+        remote_values = {contact_id: self._prepare_partner_values_from_contact(contact)
+                         for contact_id, contact in contacts.items()}
+        matched.update(self._link_contacts_by_phone_or_email({
+            contact_id: values for contact_id, values in remote_values.items() if contact_id not in matched
+        }))
+
+        # Missing local: create the partners
+        missing_local = [contact for contact_id, contact in contacts.items() if contact_id not in matched]
+        if missing_local:
+            self._sync_contact_page(missing_local)
+
+        # Field drift
+        to_push = Partner
+        for contact_id, partner in matched.items():
+            values = remote_values[contact_id]
+            drift = [
+                name for name in RECONCILED_FIELDS
+                if (normalize_phone_number(partner.phone) != normalize_phone_number(values['phone'])
+                    if name == 'phone' else (partner[name] or False) != values[name])
+            ]
+            if not drift:
+                continue
+            updated_at = parse_openphone_datetime(contacts[contact_id].get('updatedAt'))
+            local_hash = Partner._get_openphone_payload_hash(Partner._prepare_openphone_contact_fields(partner))
+            if partner.openphone_payload_hash and partner.openphone_payload_hash != local_hash:
+                # Changed in Odoo since the last sync
+                to_push |= partner
+            else:
+                if updated_at and partner.openphone_updated_at and updated_at <= partner.openphone_updated_at:
+                    # Unchanged on both sides since the last sync, only the mapping differs
+                    continue
+                partner.write(dict({name: values[name] for name in drift}, openphone_updated_at=updated_at))
+                partner.openphone_payload_hash = Partner._get_openphone_payload_hash(
+                    Partner._prepare_openphone_contact_fields(partner))
+        if to_push:
+            _logger.info("Queueing %d partners changed in Odoo for OpenPhone", len(to_push))
+            self.env['openphone.sync.job'].sudo()._enqueue(to_push, 'update')
+
+        Partner.concat(*matched.values()).write({'openphone_reconciled_at': run_at})
+        if missing_local:
+            Partner.search([('openphone_contact_id', 'in', [contact['id'] for contact in missing_local])]).write(
+                {'openphone_reconciled_at': run_at})
+
+    def _reconcile_missing_remote(self, run_at, chunk_size):
+        """Queue the creation of the partners no OpenPhone contact matched."""
+        Partner = self.env['res.partner'].with_context(openphone_sync_origin='openphone')
+        not_reconciled = self.env.company._get_openphone_partner_domain() + [
+            '|', ('openphone_reconciled_at', '=', False), ('openphone_reconciled_at', '<', run_at),
+        ]
+
+        # Contact IDs that no longer exist in OpenPhone are stale; contacts
+        # created by the sync job queue during the run are more recent than it
+        stale = Partner.with_context(active_test=False).search(not_reconciled + [
+            ('openphone_contact_id', '!=', False),
+            '|', ('openphone_updated_at', '=', False), ('openphone_updated_at', '<', run_at),
+        ])
+        if stale:
+            _logger.info("Clearing %d OpenPhone contact IDs missing in OpenPhone", len(stale))
+            stale.write({'openphone_contact_id': False, 'openphone_payload_hash': False})
+
+        domain = self._get_reconcile_partner_domain() + not_reconciled + [('openphone_contact_id', '=', False)]
+        last_id = 0
+        while True:
+            partners = Partner.search(domain + [('id', '>', last_id)], order='id', limit=chunk_size)
+            if not partners:
+                break
+            self.env['openphone.sync.job'].sudo()._enqueue(partners, 'create')
+            partners.write({'openphone_reconciled_at': run_at})
+            last_id = partners[-1].id
+            self.env.cr.commit()
+            self.env.invalidate_all()
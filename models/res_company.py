@@ -0,0 +1,73 @@
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    openphone_api_key = fields.Char(string="OpenPhone API Key", groups='base.group_system',
+                                    help="API key of the OpenPhone workspace of this company. "
+                                         "Falls back to the openphone.api.key system parameter.")
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'openphone_api_key' in vals:
+            self.env.registry.clear_cache()
+        return res
+
+    @api.model
+    @tools.ormcache('company_id')
+    def _get_openphone_api_key_cached(self, company_id):
+        company = self.sudo().browse(company_id)
+        return company.openphone_api_key or self.env['ir.config_parameter'].sudo().get_param('openphone.api.key') or False
+
+    def _get_openphone_api_key(self):
+        """API key of the company's OpenPhone workspace, cached in the registry."""
+        self.ensure_one()
+        return self._get_openphone_api_key_cached(self.id)
+
+    def _get_openphone_headers(self):
+        """HTTP headers authenticating the requests to the company's OpenPhone workspace."""
+        api_key = self._get_openphone_api_key()
+        if not api_key:
+            raise UserError(_("No OpenPhone API key found for %s. Please configure it in settings.", self.name))
+        return {
+            "Authorization": api_key,
+            "Content-Type": "application/json"
+        }
+
+    @api.model
+    def _get_openphone_shared_company(self):
+        """
+        Company whose OpenPhone workspace holds the partners shared between
+        companies: the oldest company using the openphone.api.key system
+        parameter, or the oldest company when every company has its own key.
+        It does not depend on the current company, so a shared partner always
+        lives in the same workspace whoever edits it.
+        """
+        companies = self.sudo().search([], order='id')
+        return (companies.filtered(lambda company: not company.openphone_api_key)[:1] or companies[:1]).sudo(False)
+
+    def _get_openphone_partner_domain(self):
+        """Domain of the partners belonging to the company's OpenPhone workspace."""
+        self.ensure_one()
+        if self.sudo().openphone_api_key:
+            if self == self._get_openphone_shared_company():
+                return ['|', ('company_id', '=', self.id), ('company_id', '=', False)]
+            return [('company_id', '=', self.id)]
+        own_key_companies = self.sudo().search([('openphone_api_key', '!=', False)])
+        return [('company_id', 'not in', own_key_companies.ids)]
+
+    def _get_openphone_created_partner_values(self):
+        """Values of the partners created from the company's OpenPhone workspace."""
+        self.ensure_one()
+        return {'company_id': self.id} if self.sudo().openphone_api_key else {}
+
+    @api.model
+    def _get_openphone_workspace_companies(self):
+        """One company per distinct OpenPhone API key."""
+        companies = {}
+        for company in self.sudo().search([]):
+            api_key = company._get_openphone_api_key()
+            if api_key:
+                companies.setdefault(api_key, company)
+        return self.browse([company.id for company in companies.values()])
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from odoo import models, fields
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = 'res.config.settings'
+
+    openphone_api_key = fields.Char(
+        string="OpenPhone API Key",
+        related='company_id.openphone_api_key',
+        readonly=False,
+        help="API key of the OpenPhone workspace of this company.",
+    )
+    openphone_recording_concurrency = fields.Integer(
+        string="Recording Lookup Concurrency",
+        config_parameter='openphone.recording_concurrency',
+        default=5,
+        help="Number of call recordings fetched in parallel when loading OpenPhone call history.",
+    )
+    openphone_webhook_secret = fields.Char(
+        string="Webhook Signing Secret",
+        config_parameter='openphone.webhook.secret',
+        help="Base64 signing secret of the OpenPhone webhook posting to /openphone/webhook.",
+    )
+    openphone_metrics_token = fields.Char(
+        string="Metrics Token",
+        config_parameter='openphone.metrics.token',
+        help="Token required to scrape /openphone/metrics?token=... with Prometheus.",
+    )
+    openphone_requests_24h = fields.Integer(string="API Requests (24h)", compute='_compute_openphone_metrics')
+    openphone_errors_24h = fields.Integer(string="API Errors (24h)", compute='_compute_openphone_metrics')
+    openphone_retries_24h = fields.Integer(string="API Retries (24h)", compute='_compute_openphone_metrics')
+    openphone_latency_avg_24h = fields.Float(string="Avg Latency (ms, 24h)", compute='_compute_openphone_metrics')
+
+    def _compute_openphone_metrics(self):
+        summary = self.env['openphone.sync.metric'].sudo()._get_summary(fields.Datetime.now() - timedelta(days=1))
+        for settings in self:
+            settings.openphone_requests_24h = summary['requests']
+            settings.openphone_errors_24h = summary['errors']
+            settings.openphone_retries_24h = summary['retries']
+            settings.openphone_latency_avg_24h = summary['latency_avg']
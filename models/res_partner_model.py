@@ -1,7 +1,119 @@
-from odoo import models, fields
+import hashlib
+import json
+from collections import defaultdict
+
+from odoo import models, fields, api, _
+
+from ..tools.phone import normalize_phone_number
+from .openphone_call import parse_openphone_datetime
 
 class ResPartner(models.Model):
     _inherit = 'res.partner'
 
-    openphone_contact_id = fields.Char(string="OpenPhone Contact ID", readonly=False)
+    openphone_contact_id = fields.Char(string="OpenPhone Contact ID", readonly=False, index=True)
+    openphone_payload_hash = fields.Char(string="OpenPhone Payload Hash", readonly=True, copy=False,
+                                         help="Hash of the contact fields last pushed to OpenPhone.")
+    openphone_updated_at = fields.Datetime(string="OpenPhone Last Update", readonly=True, copy=False,
+                                           help="updatedAt of the OpenPhone contact when it was last synced.")
+    openphone_reconciled_at = fields.Datetime(string="OpenPhone Reconciled At", readonly=True, copy=False, index=True)
+    openphone_phone_normalized = fields.Char(string="Normalized Phone", compute='_compute_openphone_phone_normalized',
+                                             store=True, index=True,
+                                             help="Phone number in E.164 format, used to match OpenPhone numbers.")
+    openphone_call_ids = fields.One2many('openphone.call', 'partner_id', string="OpenPhone Calls")
+    openphone_call_count = fields.Integer(string="OpenPhone Call Count", compute='_compute_openphone_call_count')
+    openphone_message_count = fields.Integer(string="OpenPhone Message Count",
+                                             compute='_compute_openphone_message_count')
+
+    @api.depends('phone')
+    def _compute_openphone_phone_normalized(self):
+        for partner in self:
+            partner.openphone_phone_normalized = normalize_phone_number(partner.phone)
+
+    def _compute_openphone_call_count(self):
+        counts = dict(self.env['openphone.call'].sudo()._read_group(
+            [('partner_id', 'in', self.ids)], ['partner_id'], ['__count']))
+        for partner in self:
+            partner.openphone_call_count = counts.get(partner, 0)
+
+    def _compute_openphone_message_count(self):
+        counts = dict(self.env['openphone.message'].sudo()._read_group(
+            [('partner_id', 'in', self.ids)], ['partner_id'], ['__count']))
+        for partner in self:
+            partner.openphone_message_count = counts.get(partner, 0)
+
+    def action_view_openphone_messages(self):
+        """Open the stored OpenPhone messages of the partner, newest first and paginated."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _("OpenPhone Messages"),
+            'res_model': 'openphone.message',
+            'view_mode': 'list',
+            'domain': [('partner_id', '=', self.id)],
+        }
+
+    def action_view_openphone_calls(self):
+        """Open the stored OpenPhone calls of the partner."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _("OpenPhone Calls"),
+            'res_model': 'openphone.call',
+            'view_mode': 'list,pivot',
+            'domain': [('partner_id', '=', self.id)],
+            'context': {'default_partner_id': self.id},
+        }
+
+    def _is_openphone_origin(self):
+        """
+        Whether the current changes come from OpenPhone itself (inbound syncs,
+        webhooks, write-backs of API responses). Such changes are never pushed
+        back to OpenPhone.
+        """
+        return self.env.context.get('openphone_sync_origin') == 'openphone'
+
+    def action_openphone_flush(self):
+        """Push the queued OpenPhone changes of the partners now, without waiting for the debounce window."""
+        self.env['openphone.sync.job'].sudo()._flush(self)
+
+    def _get_openphone_company(self, shared_company=None):
+        """
+        Company whose OpenPhone workspace holds the partner. Shared partners
+        belong to the shared workspace, consistently with
+        :meth:`res.company._get_openphone_partner_domain`.
+        """
+        self.ensure_one()
+        return self.company_id or shared_company or self.env['res.company']._get_openphone_shared_company()
+
+    def _group_by_openphone_company(self):
+        """Split the partners by the OpenPhone workspace they belong to."""
+        groups = defaultdict(lambda: self.browse())
+        shared_company = self.env['res.company']._get_openphone_shared_company()
+        for partner in self:
+            groups[partner._get_openphone_company(shared_company)] |= partner
+        return groups
+
+    def _prepare_openphone_contact_fields(self, partner):
+        """Build the non-empty OpenPhone ``defaultFields`` of a partner."""
+        default_fields = {
+            "firstName": partner.name.split(" ")[0] if partner.name else None,
+            "lastName": " ".join(partner.name.split(" ")[1:]) if partner.name and len(partner.name.split(" ")) > 1 else None,
+            "company": partner.company_name or None,
+            "role": partner.function or None,
+            "emails": [{"name": "Work email", "value": partner.email}] if partner.email else [],
+            "phoneNumbers": [{"name": "Work phone", "value": partner.phone}] if partner.phone else []
+        }
+        # Remove keys with empty values
+        return {k: v for k, v in default_fields.items() if v}
+
+    def _get_openphone_updated_at(self, response):
+        """Extract the contact ``updatedAt`` version from an OpenPhone response."""
+        try:
+            return parse_openphone_datetime((response.json().get("data") or {}).get("updatedAt"))
+        except ValueError:
+            return False
 
+    def _get_openphone_payload_hash(self, default_fields):
+        """Hash the non-empty OpenPhone default fields of a contact payload."""
+        payload = {k: v for k, v in default_fields.items() if v}
+        return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
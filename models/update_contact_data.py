@@ -4,19 +4,22 @@ import requests
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from ..tools.openphone_client import get_openphone_client
+
 _logger = logging.getLogger(__name__)
 
+# Partner fields mapped to the OpenPhone contact; writes to any other field are not pushed
+OPENPHONE_SYNC_FIELDS = {'name', 'company_name', 'function', 'email', 'phone'}
+
 class ResPartner(models.Model):
     _inherit = 'res.partner'
 
-    def _update_openphone_contact(self, partner):
-        """Update the contact in OpenPhone."""
-        # Fetch API key from system parameters
-        api_key = self.env['ir.config_parameter'].sudo().get_param('openphone.api.key', default='')
-        if not api_key:
-            _logger.warning("OpenPhone API key is missing. Please configure it.")
-            raise UserError(_("No OpenPhone API key found. Please configure it in settings."))
-
+    def _prepare_openphone_update_request(self, partner, company=None):
+        """
+        Build the PATCH request updating the partner in the OpenPhone workspace
+        of ``company`` (the partner's workspace by default), or return None
+        when the payload is identical to the last one pushed.
+        """
         # Get OpenPhone contact ID from the partner
         openphone_contact_id = partner.openphone_contact_id
         if not openphone_contact_id:
@@ -26,55 +29,49 @@ class ResPartner(models.Model):
         api_url = f"https://api.openphone.com/v1/contacts/{openphone_contact_id}"
 
         # Prepare the data payload with updated values
-        data = {
-            "defaultFields": {
-                "firstName": partner.name.split(" ")[0] if partner.name else None,
-                "lastName": " ".join(partner.name.split(" ")[1:]) if len(partner.name.split(" ")) > 1 else None,
-                "company": partner.company_name or None,
-                "role": partner.function or None,
-                "emails": [{"name": "Work email", "value": partner.email}] if partner.email else [],
-                "phoneNumbers": [{"name": "Work phone", "value": partner.phone}] if partner.phone else []
-            },
-            
-        }
+        data = {"defaultFields": self._prepare_openphone_contact_fields(partner)}
 
-        # Remove keys with empty values
-        data["defaultFields"] = {k: v for k, v in data["defaultFields"].items() if v}
+        if partner.openphone_payload_hash == self._get_openphone_payload_hash(data["defaultFields"]):
+            _logger.debug("OpenPhone payload unchanged for partner %s. Skipping update.", partner.name)
+            return None
 
-        headers = {
-            "Authorization": api_key,
-            "Content-Type": "application/json"
-        }
+        # API key of the partner's OpenPhone workspace
+        headers = (company or partner._get_openphone_company())._get_openphone_headers()
 
-        # Log debug information
-        _logger.debug("OpenPhone API Key: %s", api_key)
-        _logger.debug("OpenPhone API URL: %s", api_url)
-        _logger.debug("Payload being sent to OpenPhone API: %s", data)
+        return {'method': 'PATCH', 'url': api_url, 'headers': headers, 'json': data}
 
+    def _process_openphone_update_response(self, partner, response, data=None):
+        """Check the OpenPhone answer to a contact update and remember what was pushed."""
+        if response.status_code == 200:
+            _logger.info("Successfully updated contact in OpenPhone: %s", partner.name)
+            values = {'openphone_updated_at': self._get_openphone_updated_at(response)}
+            if data:
+                values['openphone_payload_hash'] = self._get_openphone_payload_hash(data["defaultFields"])
+            partner.with_context(openphone_sync_origin='openphone').write(values)
+        else:
+            # Log and raise an error for non-successful status codes
+            _logger.error("Failed to update contact in OpenPhone: %s", response.text)
+            # The status and answer are kept on the failed sync job
+            raise UserError(_("Failed to update contact in OpenPhone (HTTP %(status)s): %(error)s",
+                              status=response.status_code, error=response.text[:500]))
+
+    def _update_openphone_contact(self, partner):
+        """Update the contact in OpenPhone."""
+        request = self._prepare_openphone_update_request(partner)
+        if not request:
+            return
         try:
             # Send PATCH request to OpenPhone API to update the contact
-            response = requests.patch(api_url, headers=headers, json=data)
-            _logger.debug("OpenPhone API Response Status Code: %s", response.status_code)
-            _logger.debug("OpenPhone API Response Content: %s", response.text)
-
-            if response.status_code == 200:
-                _logger.info("Successfully updated contact in OpenPhone: %s", partner.name)
-            else:
-                # Log and raise an error for non-successful status codes
-                _logger.error("Failed to update contact in OpenPhone: %s", response.text)
-                raise UserError(_("Failed to update contact in OpenPhone. Check logs for details."))
-
+            response = get_openphone_client(self.env).request(**request)
         except requests.exceptions.RequestException as e:
             _logger.error("Failed to update contact in OpenPhone: %s", str(e))
             raise UserError(_("Failed to update contact in OpenPhone. Check logs for details."))
+        self._process_openphone_update_response(partner, response, request['json'])
 
     def write(self, vals):
-        """Override write method to send updates to OpenPhone."""
+        """Override write method to queue updates for OpenPhone."""
         partner_updated = super(ResPartner, self).write(vals)
-        for partner in self:
-            if partner.openphone_contact_id:
-                try:
-                    self._update_openphone_contact(partner)
-                except UserError as e:
-                    _logger.warning("Contact update in OpenPhone failed for partner %s: %s", partner.name, str(e))
+        if not self._is_openphone_origin() and OPENPHONE_SYNC_FIELDS.intersection(vals):
+            partners = self.filtered('openphone_contact_id')
+            self.env['openphone.sync.job'].sudo()._enqueue(partners, 'update')
         return partner_updated
@@ -0,0 +1,95 @@
+/** @odoo-module **/
+
+import { Component, onWillStart, useState } from "@odoo/owl";
+import { deserializeDateTime, formatDateTime } from "@web/core/l10n/dates";
+import { _t } from "@web/core/l10n/translation";
+import { rpc } from "@web/core/network/rpc";
+import { Pager } from "@web/core/pager/pager";
+import { registry } from "@web/core/registry";
+import { standardWidgetProps } from "@web/views/widgets/standard_widget_props";
+
+/**
+ * Call history of a partner, read page by page from the calls stored in Odoo.
+ * It is only mounted when its notebook page is opened, and only asks Odoo to
+ * query OpenPhone when the user clicks Refresh.
+ */
+export class OpenPhoneCallHistory extends Component {
+    static template = "meta_openPhone_api_sync_to_CRM.OpenPhoneCallHistory";
+    static components = { Pager };
+    static props = { ...standardWidgetProps };
+
+    setup() {
+        this.limit = 20;
+        this.state = useState({
+            calls: [],
+            statuses: [],
+            total: 0,
+            offset: 0,
+            direction: "",
+            status: "",
+            dateFrom: "",
+            dateTo: "",
+            loading: false,
+            error: null,
+        });
+        onWillStart(() => this.load());
+    }
+
+    get partnerId() {
+        return this.props.record.resId;
+    }
+
+    async load({ refresh = false } = {}) {
+        if (!this.partnerId) {
+            return;
+        }
+        this.state.loading = true;
+        try {
+            const result = await rpc("/openphone/call_history", {
+                partner_id: this.partnerId,
+                offset: this.state.offset,
+                limit: this.limit,
+                direction: this.state.direction || null,
+                status: this.state.status || null,
+                date_from: this.state.dateFrom || null,
+                date_to: this.state.dateTo || null,
+                refresh,
+            });
+            Object.assign(this.state, {
+                calls: result.calls,
+                statuses: result.statuses,
+                total: result.total,
+                offset: result.offset,
+                error: result.error,
+            });
+        } finally {
+            this.state.loading = false;
+        }
+    }
+
+    formatDate(value) {
+        return value ? formatDateTime(deserializeDateTime(value)) : _t("Not Available");
+    }
+
+    onFilterChange(name, ev) {
+        this.state[name] = ev.target.value;
+        this.state.offset = 0;
+        this.load();
+    }
+
+    onPagerUpdate({ offset }) {
+        this.state.offset = offset;
+        return this.load();
+    }
+
+    onRefresh() {
+        this.state.offset = 0;
+        return this.load({ refresh: true });
+    }
+}
+
+export const openPhoneCallHistory = {
+    component: OpenPhoneCallHistory,
+};
+
+registry.category("view_widgets").add("openphone_call_history", openPhoneCallHistory);
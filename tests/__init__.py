@@ -0,0 +1,5 @@
+from . import test_phone
+from . import test_reconcile
+from . import test_sync_job
+from . import test_webhook
+from . import test_sync_benchmark
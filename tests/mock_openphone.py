@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the OpenPhone API, used by the benchmark suite.
+
+It serves the endpoints used by the module from in-memory data, with
+configurable latency, page size, 429 injection and random failures, and counts
+the requests it receives per endpoint. It only depends on the standard library
+so it can also be run on its own against a development database::
+
+    python tests/mock_openphone.py --port 8765 --contacts 100000 --latency 0.05
+
+and ``openphone.api.url`` set to ``http://127.0.0.1:8765/v1``.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def _iso(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def _parse_iso(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class MockOpenPhoneData:
+    """In-memory OpenPhone workspace: phone numbers, contacts, calls and messages."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phone_numbers = []
+        self.contacts = {}
+        self.calls = []
+        self.recordings = {}
+        self.conversations = []
+        self.messages = []
+
+    def seed(self, phone_numbers=1, contacts=0, calls_per_participant=0, participants=(), recording_ratio=0.5,
+             messages_per_participant=0):
+        """Generate deterministic data; calls and messages are created for each given participant number."""
+        rng = random.Random(42)
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        for index in range(phone_numbers):
+            self.phone_numbers.append({
+                'id': f'PN{index:08d}',
+                'number': f'+1555010{index:04d}',
+                'formattedNumber': f'(555) 010-{index:04d}',
+                'name': f'Line {index}',
+            })
+        for index in range(contacts):
+            contact_id = f'CT{index:010d}'
+            self.contacts[contact_id] = {
+                'id': contact_id,
+                'createdAt': _iso(now - timedelta(days=30)),
+                'updatedAt': _iso(now - timedelta(days=1)),
+                'defaultFields': {
+                    'firstName': f'First{index}',
+                    'lastName': f'Last{index}',
+                    'company': f'Company {index % 500}',
+                    'role': 'Buyer',
+                    'emails': [{'name': 'Work email', 'value': f'contact{index}@example.com'}],
+                    'phoneNumbers': [{'name': 'Work phone', 'value': f'+1444{index:07d}'}],
+                },
+            }
+        for participant in participants:
+            for index in range(calls_per_participant):
+                phone_number = self.phone_numbers[index % len(self.phone_numbers)]
+                created = now - timedelta(hours=index + 1)
+                call_id = f'AC{uuid.UUID(int=rng.getrandbits(128)).hex}'
+                missed = index % 7 == 0
+                self.calls.append({
+                    'id': call_id,
+                    'phoneNumberId': phone_number['id'],
+                    'participants': [participant],
+                    'direction': 'incoming' if index % 2 else 'outgoing',
+                    'status': 'missed' if missed else 'completed',
+                    'duration': 0 if missed else rng.randint(5, 900),
+                    'createdAt': _iso(created),
+                    'completedAt': None if missed else _iso(created + timedelta(minutes=5)),
+                })
+                if not missed and rng.random() < recording_ratio:
+                    self.recordings[call_id] = f'https://recordings.example.com/{call_id}.mp3'
+        for index, participant in enumerate(participants if messages_per_participant else ()):
+            phone_number = self.phone_numbers[index % len(self.phone_numbers)]
+            self.conversations.append({
+                'id': f'CN{index:010d}',
+                'phoneNumberId': phone_number['id'],
+                'participants': [participant],
+                'createdAt': _iso(now - timedelta(days=30)),
+                'updatedAt': _iso(now - timedelta(minutes=1)),
+                'lastActivityAt': _iso(now - timedelta(minutes=1)),
+            })
+            for position in range(messages_per_participant):
+                incoming = position % 2 == 0
+                self.messages.append({
+                    'id': f'MS{index:06d}{position:06d}',
+                    'phoneNumberId': phone_number['id'],
+                    'from': participant if incoming else phone_number['number'],
+                    'to': [phone_number['number'] if incoming else participant],
+                    'direction': 'incoming' if incoming else 'outgoing',
+                    'text': f'Message {position} with {participant}',
+                    'status': 'received' if incoming else 'delivered',
+                    'createdAt': _iso(now - timedelta(minutes=messages_per_participant - position)),
+                })
+        # OpenPhone keeps a conversation per number and participant for calls too
+        known = {(conversation['phoneNumberId'], conversation['participants'][0])
+                 for conversation in self.conversations}
+        last_calls = {}
+        for call in self.calls:
+            key = (call['phoneNumberId'], call['participants'][0])
+            last_calls[key] = max(last_calls.get(key, call['createdAt']), call['createdAt'])
+        for index, ((phone_number_id, participant), last_call_at) in enumerate(sorted(last_calls.items())):
+            if (phone_number_id, participant) not in known:
+                self.conversations.append({
+                    'id': f'CC{index:010d}',
+                    'phoneNumberId': phone_number_id,
+                    'participants': [participant],
+                    'createdAt': _iso(now - timedelta(days=30)),
+                    'updatedAt': last_call_at,
+                    'lastActivityAt': last_call_at,
+                })
+        return self
+
+
+class MockOpenPhoneServer:
+    """Threaded HTTP server serving :class:`MockOpenPhoneData`."""
+
+    def __init__(self, data=None, host='127.0.0.1', port=0, latency=0.0, page_size=None,
+                 rate_limit_every=0, failure_rate=0.0, retry_after=0):
+        self.data = data or MockOpenPhoneData()
+        self.latency = latency
+        self.page_size = page_size
+        self.rate_limit_every = rate_limit_every
+        self.failure_rate = failure_rate
+        self.retry_after = retry_after
+        self.request_counts = Counter()
+        self.bytes_sent = 0
+        self._counter_lock = threading.Lock()
+        self._random = random.Random(7)
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    @property
+    def total_requests(self):
+        return sum(self.request_counts.values())
+
+    def reset_counts(self):
+        with self._counter_lock:
+            self.request_counts.clear()
+            self.bytes_sent = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    ROUTES = [
+        ('GET', re.compile(r'^/v1/phone-numbers$'), '_list_phone_numbers'),
+        ('GET', re.compile(r'^/v1/contacts$'), '_list_contacts'),
+        ('POST', re.compile(r'^/v1/contacts$'), '_create_contact'),
+        ('PATCH', re.compile(r'^/v1/contacts/(?P<id>[^/]+)$'), '_update_contact'),
+        ('DELETE', re.compile(r'^/v1/contacts/(?P<id>[^/]+)$'), '_delete_contact'),
+        ('GET', re.compile(r'^/v1/calls$'), '_list_calls'),
+        ('GET', re.compile(r'^/v1/call-recordings/(?P<id>[^/]+)$'), '_get_recording'),
+        ('GET', re.compile(r'^/v1/conversations$'), '_list_conversations'),
+        ('GET', re.compile(r'^/v1/messages$'), '_list_messages'),
+    ]
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _dispatch(self, method):
+                split = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'null') if length else None
+                for route_method, pattern, handler in server.ROUTES:
+                    match = pattern.match(split.path)
+                    if route_method == method and match:
+                        status, payload, headers = server._handle(
+                            f'{method} {pattern.pattern}', handler, match.groupdict(),
+                            parse_qs(split.query), body)
+                        break
+                else:
+                    status, payload, headers = 404, {'message': 'Not found'}, {}
+
+                raw = json.dumps(payload).encode() if payload is not None else b''
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+                with server._counter_lock:
+                    server.bytes_sent += len(raw)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def do_PATCH(self):
+                self._dispatch('PATCH')
+
+            def do_DELETE(self):
+                self._dispatch('DELETE')
+
+        return Handler
+
+    def _handle(self, route, handler, path_args, query, body):
+        with self._counter_lock:
+            self.request_counts[route] += 1
+            count = self.total_requests
+            fail = self.failure_rate and self._random.random() < self.failure_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if self.rate_limit_every and count % self.rate_limit_every == 0:
+            return 429, {'message': 'Too many requests'}, {'Retry-After': str(self.retry_after)}
+        if fail:
+            return 503, {'message': 'Service unavailable'}, {}
+        return getattr(self, handler)(path_args, query, body)
+
+    def _page(self, items, query, default_size=100):
+        size = int(query.get('maxResults', [default_size])[0])
+        if self.page_size:
+            size = min(size, self.page_size)
+        offset = int(query.get('pageToken', ['0'])[0])
+        page = items[offset:offset + size]
+        next_token = str(offset + size) if offset + size < len(items) else None
+        return 200, {'data': page, 'nextPageToken': next_token, 'totalItems': len(items)}, {}
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+
+    def _list_phone_numbers(self, path_args, query, body):
+        return self._page(self.data.phone_numbers, query)
+
+    def _list_contacts(self, path_args, query, body):
+        with self.data.lock:
+            contacts = list(self.data.contacts.values())
+        return self._page(contacts, query, default_size=50)
+
+    def _create_contact(self, path_args, query, body):
+        now = _iso(datetime.now(timezone.utc))
+        contact = {
+            'id': uuid.uuid4().hex[:24],
+            'createdAt': now,
+            'updatedAt': now,
+            'defaultFields': (body or {}).get('defaultFields', {}),
+        }
+        with self.data.lock:
+            self.data.contacts[contact['id']] = contact
+        return 201, {'data': contact}, {}
+
+    def _update_contact(self, path_args, query, body):
+        with self.data.lock:
+            contact = self.data.contacts.get(path_args['id'])
+            if not contact:
+                return 404, {'message': 'Contact not found'}, {}
+            contact['defaultFields'].update((body or {}).get('defaultFields', {}))
+            contact['updatedAt'] = _iso(datetime.now(timezone.utc))
+        return 200, {'data': contact}, {}
+
+    def _delete_contact(self, path_args, query, body):
+        with self.data.lock:
+            if not self.data.contacts.pop(path_args['id'], None):
+                return 404, {'message': 'Contact not found'}, {}
+        return 204, None, {}
+
+    def _list_calls(self, path_args, query, body):
+        phone_number_id = query.get('phoneNumberId', [None])[0]
+        participants = set(query.get('participants', []))
+        created_after = query.get('createdAfter', [None])[0]
+        created_after = _parse_iso(created_after) if created_after else None
+        calls = [
+            call for call in self.data.calls
+            if (not phone_number_id or call['phoneNumberId'] == phone_number_id)
+            and (not participants or participants.intersection(call['participants']))
+            and (not created_after or _parse_iso(call['createdAt']) > created_after)
+        ]
+        return self._page(calls, query, default_size=10)
+
+    def _get_recording(self, path_args, query, body):
+        url = self.data.recordings.get(path_args['id'])
+        if not url:
+            return 200, {'data': []}, {}
+        return 200, {'data': [{'id': f"RC{path_args['id']}", 'url': url, 'type': 'audio/mpeg'}]}, {}
+
+    def _list_conversations(self, path_args, query, body):
+        updated_after = query.get('updatedAfter', [None])[0]
+        updated_after = _parse_iso(updated_after) if updated_after else None
+        conversations = [
+            conversation for conversation in self.data.conversations
+            if not updated_after or _parse_iso(conversation['updatedAt']) > updated_after
+        ]
+        return self._page(conversations, query)
+
+    def _list_messages(self, path_args, query, body):
+        phone_number_id = query.get('phoneNumberId', [None])[0]
+        participants = set(query.get('participants', []))
+        if not phone_number_id or not participants:
+            return 400, {'message': 'phoneNumberId and participants are required'}, {}
+        created_after = query.get('createdAfter', [None])[0]
+        created_after = _parse_iso(created_after) if created_after else None
+        messages = [
+            message for message in self.data.messages
+            if message['phoneNumberId'] == phone_number_id
+            and participants.intersection([message['from']] + message['to'])
+            and (not created_after or _parse_iso(message['createdAt']) > created_after)
+        ]
+        return self._page(messages, query, default_size=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in OpenPhone API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--phone-numbers', type=int, default=3)
+    parser.add_argument('--contacts', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to each response")
+    parser.add_argument('--page-size', type=int, default=None, help="Cap on maxResults")
+    parser.add_argument('--rate-limit-every', type=int, default=0, help="Answer 429 to every Nth request")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Ratio of requests answered 503")
+    args = parser.parse_args()
+
+    data = MockOpenPhoneData().seed(phone_numbers=args.phone_numbers, contacts=args.contacts)
+    server = MockOpenPhoneServer(
+        data, host=args.host, port=args.port, latency=args.latency, page_size=args.page_size,
+        rate_limit_every=args.rate_limit_every, failure_rate=args.failure_rate)
+    print(f"Mock OpenPhone API listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+from ..tools.phone import normalize_phone_number
+
+
+@tagged('post_install', '-at_install')
+class TestNormalizePhoneNumber(TransactionCase):
+
+    def test_empty(self):
+        for phone in (None, False, '', '   ', 'n/a'):
+            self.assertIs(normalize_phone_number(phone), False, phone)
+
+    def test_national_numbers(self):
+        for phone in ('5555550123', '(555) 555-0123', '555.555.0123', ' 555 555 0123 ', '1-555-555-0123'):
+            self.assertEqual(normalize_phone_number(phone), '+15555550123', phone)
+
+    def test_international_numbers(self):
+        self.assertEqual(normalize_phone_number('+44 20 7946 0958'), '+442079460958')
+        self.assertEqual(normalize_phone_number('0044 20 7946 0958'), '+442079460958')
+        self.assertEqual(normalize_phone_number('+1 (555) 555-0123'), '+15555550123')
+
+    def test_extensions(self):
+        for phone in ('555-555-0123 ext. 42', '555-555-0123 ext 42', '555-555-0123 x42', '555-555-0123 #42'):
+            self.assertEqual(normalize_phone_number(phone), '+15555550123', phone)
+
+    def test_default_country_code(self):
+        self.assertEqual(normalize_phone_number('6 12 34 56 78', default_country_code='33'), '+33612345678')
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+def make_contact(contact_id, first_name, phone=None, email=None, updated_at='2024-11-18T17:02:10.871Z'):
+    return {
+        'id': contact_id,
+        'updatedAt': updated_at,
+        'defaultFields': {
+            'firstName': first_name,
+            'phoneNumbers': [{'name': 'Work phone', 'value': phone}] if phone else [],
+            'emails': [{'name': 'Work email', 'value': email}] if email else [],
+        },
+    }
+
+
+@tagged('post_install', '-at_install')
+class TestOpenPhoneReconcile(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['ir.config_parameter'].sudo().set_param('openphone.sync.debounce', 0)
+        cls.Sync = cls.env['openphone.contact.sync']
+        cls.Partner = cls.env['res.partner'].with_context(openphone_sync_origin='openphone')
+        cls.run_at = fields.Datetime.now()
+
+    def setUp(self):
+        super().setUp()
+        # The reconciliation commits per chunk; keep everything inside the test transaction
+        self.patch(self.env.cr, 'commit', lambda: None)
+
+    def partner_of(self, contact_id):
+        return self.Partner.search([('openphone_contact_id', '=', contact_id)])
+
+    def test_link_by_phone(self):
+        partner = self.Partner.create({'name': 'By Phone', 'phone': '(555) 555-0101'})
+        self.Sync._reconcile_contact_page([make_contact('CT1', 'Phone', phone='+15555550101')], self.run_at)
+        self.assertEqual(self.partner_of('CT1'), partner)
+        self.assertEqual(partner.openphone_reconciled_at, self.run_at)
+
+    def test_link_by_email(self):
+        partner = self.Partner.create({'name': 'By Email', 'email': 'Jane.Doe@Example.com'})
+        self.Sync._reconcile_contact_page([make_contact('CT2', 'Jane', email='jane.doe@example.com')], self.run_at)
+        self.assertEqual(self.partner_of('CT2'), partner)
+
+    def test_contact_without_phone(self):
+        # Matched by email only, this partner has no phone: it must not match contacts without phone
+        other = self.Partner.create({'name': 'Other', 'email': 'b@example.com'})
+        self.Sync._reconcile_contact_page([make_contact('CT3', 'Alice', email='a@example.com')], self.run_at)
+        created = self.partner_of('CT3')
+        self.assertTrue(created)
+        self.assertNotEqual(created, other)
+        self.assertRecordValues(other, [{'name': 'Other', 'email': 'b@example.com', 'openphone_contact_id': False}])
+        self.assertEqual(created.email, 'a@example.com')
+
+    def test_contact_without_email(self):
+        other = self.Partner.create({'name': 'Other', 'phone': '+15555550104'})
+        self.Sync._reconcile_contact_page([make_contact('CT4', 'Bob', phone='+15555550199')], self.run_at)
+        created = self.partner_of('CT4')
+        self.assertTrue(created)
+        self.assertNotEqual(created, other)
+        self.assertRecordValues(other, [{'name': 'Other', 'phone': '+15555550104', 'openphone_contact_id': False}])
+
+    def test_one_partner_per_contact(self):
+        partner = self.Partner.create({'name': 'Shared Line', 'phone': '+15555550105'})
+        self.Sync._reconcile_contact_page([
+            make_contact('CT5', 'First', phone='+15555550105'),
+            make_contact('CT6', 'Second', phone='+15555550105'),
+        ], self.run_at)
+        self.assertEqual(self.partner_of('CT5'), partner)
+        self.assertTrue(self.partner_of('CT6'))
+        self.assertNotEqual(self.partner_of('CT6'), partner)
+
+    def test_missing_remote(self):
+        stale = self.Partner.create({
+            'name': 'Deleted in OpenPhone',
+            'phone': '+15555550106',
+            'openphone_contact_id': 'CT-gone',
+            'openphone_updated_at': self.run_at - timedelta(days=1),
+        })
+        recent = self.Partner.create({
+            'name': 'Created during the run',
+            'phone': '+15555550107',
+            'openphone_contact_id': 'CT-new',
+            'openphone_updated_at': self.run_at + timedelta(seconds=1),
+        })
+        local_only = self.Partner.create({'name': 'Never synced', 'email': 'local@example.com'})
+        no_address = self.Partner.create({'name': 'No phone nor email'})
+
+        self.Sync._reconcile_missing_remote(self.run_at, chunk_size=1)
+
+        self.assertRecordValues(stale, [{'openphone_contact_id': False, 'openphone_payload_hash': False}])
+        self.assertEqual(recent.openphone_contact_id, 'CT-new', "Contacts created during the run are not stale")
+        jobs = self.env['openphone.sync.job'].sudo().search([('operation', '=', 'create')])
+        self.assertIn(stale, jobs.partner_id)
+        self.assertIn(local_only, jobs.partner_id)
+        self.assertNotIn(no_address, jobs.partner_id)
+        self.assertNotIn(recent, jobs.partner_id)
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmarks of the OpenPhone sync paths against the local stand-in API.
+
+Not part of the standard test run; launch them explicitly, e.g.::
+
+    OPENPHONE_BENCH_PARTNERS=100000 odoo-bin -d bench -i meta_openPhone_api_sync_to_CRM \\
+        --test-tags openphone_benchmark --stop-after-init
+
+Each benchmark logs its wall time, HTTP request count, SQL query count and
+peak Python memory, and a summary table is logged at the end of the class.
+"""
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from ..models.openphone_call import parse_openphone_datetime
+from .mock_openphone import MockOpenPhoneData, MockOpenPhoneServer
+
+_logger = logging.getLogger(__name__)
+
+BENCH_PARTNERS = int(os.environ.get('OPENPHONE_BENCH_PARTNERS', 10000))
+BENCH_CALL_PARTNERS = int(os.environ.get('OPENPHONE_BENCH_CALL_PARTNERS', 50))
+BENCH_CALLS = int(os.environ.get('OPENPHONE_BENCH_CALLS', 20))
+BENCH_MESSAGES = int(os.environ.get('OPENPHONE_BENCH_MESSAGES', 200))
+BENCH_LATENCY = float(os.environ.get('OPENPHONE_BENCH_LATENCY', 0))
+
+
+@tagged('-standard', '-at_install', 'post_install', 'openphone_benchmark')
+class TestOpenPhoneSyncBenchmark(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.call_numbers = [f'+1333{index:07d}' for index in range(BENCH_CALL_PARTNERS)]
+        cls.mock_data = MockOpenPhoneData().seed(
+            phone_numbers=3, contacts=BENCH_PARTNERS,
+            calls_per_participant=BENCH_CALLS, participants=cls.call_numbers,
+            messages_per_participant=BENCH_MESSAGES)
+        cls.server = MockOpenPhoneServer(cls.mock_data, latency=BENCH_LATENCY).start()
+        cls.addClassCleanup(cls.server.stop)
+
+        ICP = cls.env['ir.config_parameter'].sudo()
+        ICP.set_param('openphone.api.key', 'benchmark-key')
+        ICP.set_param('openphone.api.url', cls.server.url)
+        # Measure the module, not the production rate limit
+        ICP.set_param('openphone.rate_limit', 1000000)
+        ICP.set_param('openphone.http.backoff_factor', 0)
+        # Push right away; debouncing is covered by its own test
+        ICP.set_param('openphone.sync.debounce', 0)
+
+        cls.results = []
+        cls.addClassCleanup(cls._log_summary)
+
+    def setUp(self):
+        super().setUp()
+        # The syncs commit per page/chunk; keep everything inside the test transaction
+        self.patch(self.env.cr, 'commit', lambda: None)
+        self.server.rate_limit_every = 0
+        self.server.failure_rate = 0.0
+        self.server.reset_counts()
+
+    @classmethod
+    def _log_summary(cls):
+        lines = ["%-32s %8s %10s %8s %9s %10s" % ('benchmark', 'records', 'wall (s)', 'http', 'sql', 'peak (MB)')]
+        for result in cls.results:
+            lines.append("%-32s %8d %10.2f %8d %9d %10.1f" % (
+                result['name'], result['records'], result['wall_time'],
+                result['http_requests'], result['sql_queries'], result['peak_memory'] / 1024 / 1024))
+        _logger.info("OpenPhone sync benchmark summary:\n%s", "\n".join(lines))
+
+    @contextmanager
+    def measure(self, name, records):
+        """Measure the enclosed block and record the result."""
+        cr = self.env.cr
+        self.server.reset_counts()
+        queries = cr.sql_log_count
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+            self.env.flush_all()
+        finally:
+            wall_time = time.perf_counter() - start
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        result = {
+            'name': name,
+            'records': records,
+            'wall_time': wall_time,
+            'http_requests': self.server.total_requests,
+            'sql_queries': cr.sql_log_count - queries,
+            'peak_memory': peak,
+        }
+        self.results.append(result)
+        _logger.info("OpenPhone benchmark %(name)s: %(records)d records in %(wall_time).2fs, "
+                     "%(http_requests)d HTTP requests, %(sql_queries)d SQL queries, "
+                     "%(peak_memory)d bytes peak memory", result)
+
+    def drain_jobs(self):
+        """Run the outbound queue cron until no job is pending."""
+        Job = self.env['openphone.sync.job'].sudo()
+        while Job.search_count([('state', '=', 'pending')]):
+            Job._cron_process_jobs()
+
+    def create_synced_partners(self, count):
+        """Create partners already linked to the seeded OpenPhone contacts."""
+        Partner = self.env['res.partner'].with_context(openphone_sync_origin='openphone')
+        contact_ids = list(self.mock_data.contacts)[:count]
+        return Partner.create([{
+            'name': f'Synced {index}',
+            'email': f'synced{index}@example.com',
+            'openphone_contact_id': contact_id,
+        } for index, contact_id in enumerate(contact_ids)])
+
+    def test_01_fetch_and_sync_contacts(self):
+        with self.measure('fetch_and_sync_contacts', BENCH_PARTNERS):
+            self.env['openphone.contact.sync'].fetch_and_sync_contacts()
+
+        synced = self.env['res.partner'].search_count([('openphone_contact_id', '!=', False)])
+        self.assertGreaterEqual(synced, BENCH_PARTNERS)
+        self.assertFalse(self.env['openphone.sync.job'].sudo().search_count([]),
+                         "Inbound contacts must not be pushed back to OpenPhone")
+
+    def test_02_create(self):
+        with self.measure('create (enqueue)', BENCH_PARTNERS):
+            partners = self.env['res.partner'].create([{
+                'name': f'Bench Partner {index}',
+                'email': f'bench{index}@example.com',
+                'phone': f'+1222{index:07d}',
+            } for index in range(BENCH_PARTNERS)])
+        self.assertEqual(self.server.total_requests, 0, "create must not wait on OpenPhone")
+
+        with self.measure('create (push)', BENCH_PARTNERS):
+            self.drain_jobs()
+        self.assertFalse(partners.filtered(lambda partner: not partner.openphone_contact_id))
+
+    def test_03_write(self):
+        partners = self.create_synced_partners(BENCH_PARTNERS)
+        with self.measure('write (enqueue)', len(partners)):
+            partners.write({'function': 'Benchmark'})
+        with self.measure('write (push)', len(partners)):
+            self.drain_jobs()
+        self.assertEqual(self.server.total_requests, len(partners))
+
+    def test_04_write_without_changes(self):
+        partners = self.create_synced_partners(BENCH_PARTNERS)
+        partners.write({'function': 'Benchmark'})
+        self.drain_jobs()
+
+        with self.measure('write (no-op)', len(partners)):
+            partners.write({'comment': 'Not synced to OpenPhone'})
+            partners.write({'function': 'Benchmark'})
+            self.drain_jobs()
+        self.assertEqual(self.server.total_requests, 0, "Unchanged payloads must not be pushed")
+
+    def test_05_unlink(self):
+        partners = self.create_synced_partners(BENCH_PARTNERS)
+        with self.measure('unlink (enqueue)', len(partners)):
+            partners.unlink()
+        with self.measure('unlink (push)', len(partners)):
+            self.drain_jobs()
+        self.assertEqual(self.server.total_requests, len(partners))
+
+    def test_06_fetch_call_logs(self):
+        partners = self.env['res.partner'].create([
+            {'name': f'Caller {index}', 'phone': number} for index, number in enumerate(self.call_numbers)
+        ])
+        with self.measure('action_fetch_call_logs', len(partners)):
+            partners.action_fetch_call_logs()
+        self.assertEqual(len(partners.openphone_call_ids), BENCH_CALL_PARTNERS * BENCH_CALLS)
+
+        with self.measure('action_fetch_call_logs (again)', len(partners)):
+            partners.action_fetch_call_logs()
+        self.assertFalse(
+            [route for route in self.server.request_counts if 'call-recordings' in route],
+            "A second fetch must not request recordings again")
+
+    def test_07_cron_call_history(self):
+        partners = self.env['res.partner'].create([
+            {'name': f'Caller {index}', 'phone': number} for index, number in enumerate(self.call_numbers)
+        ])
+        # Conversation activity, as left by the message sync
+        Conversation = self.env['openphone.conversation']
+        keys = {(conversation['phoneNumberId'], conversation['participants'][0]): conversation
+                for conversation in self.mock_data.conversations}
+        for key, record in Conversation._get_conversations(keys).items():
+            record.last_activity_at = parse_openphone_datetime(keys[key]['lastActivityAt'])
+
+        with self.measure('cron call history', len(partners)):
+            self.env['openphone.call']._cron_sync_call_history()
+        self.assertEqual(len(partners.openphone_call_ids), BENCH_CALL_PARTNERS * BENCH_CALLS)
+
+        with self.measure('cron call history (again)', len(partners)):
+            self.env['openphone.call']._cron_sync_call_history()
+        self.assertFalse(
+            [route for route in self.server.request_counts if 'calls' in route],
+            "Conversations without new activity must not be polled again")
+
+    def test_08_rate_limited_push(self):
+        self.server.rate_limit_every = 10
+        count = min(BENCH_PARTNERS, 500)
+        partners = self.env['res.partner'].create([
+            {'name': f'Throttled {index}'} for index in range(count)
+        ])
+        with self.measure('create (push, 429 every 10)', count):
+            self.drain_jobs()
+        self.assertFalse(partners.filtered(lambda partner: not partner.openphone_contact_id))
+        self.assertFalse(self.env['openphone.sync.job'].sudo().search_count([('state', '=', 'failed')]))
+
+    def test_09_reconcile_contacts(self):
+        # Half of the contacts already exist locally without their ID, plus as many local-only partners
+        count = BENCH_PARTNERS // 2
+        existing = self.env['res.partner'].with_context(openphone_sync_origin='openphone').create([{
+            'name': f'First{index} Last{index}',
+            'email': f'contact{index}@example.com',
+        } for index in range(count)])
+        local_only = self.env['res.partner'].with_context(openphone_sync_origin='openphone').create([{
+            'name': f'Local {index}',
+            'email': f'local{index}@example.com',
+        } for index in range(count)])
+
+        with self.measure('reconcile_contacts', BENCH_PARTNERS + count):
+            self.env['openphone.contact.sync'].reconcile_contacts()
+
+        self.assertFalse(existing.filtered(lambda partner: not partner.openphone_contact_id),
+                         "Partners must be matched to their contact on the email")
+        synced = self.env['res.partner'].search_count([('openphone_contact_id', '!=', False)])
+        self.assertGreaterEqual(synced, BENCH_PARTNERS)
+        jobs = self.env['openphone.sync.job'].sudo().search([('operation', '=', 'create')])
+        self.assertLessEqual(local_only, jobs.partner_id)
+
+    def test_10_replay_failed_jobs(self):
+        Job = self.env['openphone.sync.job'].sudo()
+        count = min(BENCH_PARTNERS, 200)
+        partners = self.env['res.partner'].create([
+            {'name': f'Outage {index}'} for index in range(count)
+        ])
+        # OpenPhone is down: creations are not retried in-process, the jobs are kept for replay
+        self.server.failure_rate = 1.0
+        Job._cron_process_jobs()
+        failed = Job.search([('state', '=', 'failed')])
+        self.assertEqual(len(failed), count)
+        self.assertEqual(set(failed.mapped('attempt_count')), {1})
+        self.assertTrue(all(failed.mapped('next_retry_at')))
+
+        self.server.failure_rate = 0.0
+        failed.write({'next_retry_at': fields.Datetime.now()})
+        with self.measure('replay failed jobs', count):
+            Job._cron_replay_failed_jobs()
+            self.drain_jobs()
+        self.assertFalse(partners.filtered(lambda partner: not partner.openphone_contact_id))
+        self.assertFalse(Job.search_count([]))
+
+    def test_11_cron_messages(self):
+        partners = self.env['res.partner'].create([
+            {'name': f'Texter {index}', 'phone': number} for index, number in enumerate(self.call_numbers)
+        ])
+        Conversation = self.env['openphone.conversation']
+        with self.measure('cron messages', BENCH_CALL_PARTNERS * BENCH_MESSAGES):
+            Conversation._cron_sync_messages()
+        self.assertEqual(self.env['openphone.message'].search_count([('partner_id', 'in', partners.ids)]),
+                         BENCH_CALL_PARTNERS * BENCH_MESSAGES)
+
+        with self.measure('cron messages (again)', len(partners)):
+            Conversation._cron_sync_messages()
+        self.assertFalse(
+            [route for route in self.server.request_counts if 'messages' in route],
+            "Conversations without new activity must not be fetched again")
+
+    def test_12_debounced_writes(self):
+        self.env['ir.config_parameter'].sudo().set_param('openphone.sync.debounce', 10)
+        self.addCleanup(self.env['ir.config_parameter'].sudo().set_param, 'openphone.sync.debounce', 0)
+        Job = self.env['openphone.sync.job'].sudo()
+        partners = self.create_synced_partners(min(BENCH_PARTNERS, 500))
+
+        with self.measure('write x5 (debounced)', len(partners)):
+            for index in range(5):
+                partners.write({'function': f'Edit {index}'})
+            Job._cron_process_jobs()
+        self.assertEqual(self.server.total_requests, 0, "Jobs must wait for the edits to settle")
+        self.assertEqual(Job.search_count([('state', '=', 'pending')]), len(partners))
+
+        with self.measure('flush', len(partners)):
+            partners.action_openphone_flush()
+        self.assertEqual(self.server.total_requests, len(partners), "The last state must be pushed once")
+        self.assertFalse(Job.search_count([]))
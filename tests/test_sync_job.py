@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import timedelta
+
+from freezegun import freeze_time
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from ..models.openphone_sync_job import MAX_RETRY_DELAY
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.payload = payload
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self.payload
+
+
+@tagged('post_install', '-at_install')
+class TestOpenPhoneSyncJob(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ICP = cls.env['ir.config_parameter'].sudo()
+        cls.ICP.set_param('openphone.api.key', 'test-key')
+        cls.ICP.set_param('openphone.sync.debounce', 0)
+        cls.ICP.set_param('openphone.sync.retry_delay', 60)
+        cls.ICP.set_param('openphone.sync.max_attempts', 3)
+        cls.Job = cls.env['openphone.sync.job'].sudo()
+        cls.Partner = cls.env['res.partner']
+
+    def create_synced_partner(self, name='Synced'):
+        """Create a partner already linked to an OpenPhone contact, without queueing anything."""
+        return self.Partner.with_context(openphone_sync_origin='openphone').create({
+            'name': name,
+            'phone': '+15555550123',
+            'openphone_contact_id': f'contact-{name}',
+        })
+
+    def jobs(self, partner):
+        return self.Job.search([('partner_id', '=', partner.id)])
+
+    # Coalescing
+
+    def test_create(self):
+        partner = self.Partner.create({'name': 'New'})
+        job = self.jobs(partner)
+        self.assertRecordValues(job, [{'operation': 'create', 'state': 'pending', 'scheduled_at': False}])
+        self.assertEqual(job.company_id, partner._get_openphone_company())
+
+    def test_create_then_unlink(self):
+        partner = self.Partner.create({'name': 'Short lived'})
+        partner_id = partner.id
+        partner.unlink()
+        self.assertFalse(self.Job.search([('partner_id', '=', partner_id)]))
+        self.assertFalse(self.Job.search([('partner_name', '=', 'Short lived')]),
+                         "Nothing must be pushed for a partner never created in OpenPhone")
+
+    def test_create_then_writes(self):
+        partner = self.Partner.create({'name': 'Edited'})
+        for index in range(3):
+            partner.write({'function': f'Edit {index}'})
+        self.assertRecordValues(self.jobs(partner), [{'operation': 'create'}])
+
+    def test_create_then_create(self):
+        partner = self.Partner.create({'name': 'Reconciled'})
+        self.Job._enqueue(partner, 'create')
+        self.assertRecordValues(self.jobs(partner), [{'operation': 'create'}])
+
+    def test_create_skipped_when_linked(self):
+        partner = self.create_synced_partner()
+        self.Job._enqueue(partner, 'create')
+        self.assertFalse(self.jobs(partner))
+
+    def test_updates(self):
+        partner = self.create_synced_partner()
+        for index in range(3):
+            partner.write({'function': f'Edit {index}'})
+        self.assertRecordValues(self.jobs(partner), [{
+            'operation': 'update',
+            'openphone_contact_id': partner.openphone_contact_id,
+        }])
+
+    def test_update_ignores_other_fields(self):
+        partner = self.create_synced_partner()
+        partner.write({'comment': 'Not synced'})
+        self.assertFalse(self.jobs(partner))
+
+    def test_update_then_unlink(self):
+        partner = self.create_synced_partner()
+        partner.write({'function': 'Edited'})
+        contact_id = partner.openphone_contact_id
+        partner.unlink()
+        self.assertRecordValues(self.Job.search([('openphone_contact_id', '=', contact_id)]), [{
+            'operation': 'delete',
+            'partner_id': False,
+            'partner_name': 'Synced',
+            'scheduled_at': False,
+        }])
+
+    def test_unlink_unlinked_partner(self):
+        partner = self.Partner.with_context(openphone_sync_origin='openphone').create({'name': 'Local only'})
+        partner.unlink()
+        self.assertFalse(self.Job.search([('partner_name', '=', 'Local only')]))
+
+    def test_origin_not_pushed_back(self):
+        partner = self.create_synced_partner()
+        partner.with_context(openphone_sync_origin='openphone').write({'function': 'From OpenPhone'})
+        self.assertFalse(self.jobs(partner))
+
+    def test_follow_up_waits_for_previous_job(self):
+        partner = self.Partner.create({'name': 'Follow-up'})
+        create_job = self.jobs(partner)
+        update_job = self.Job.create({'partner_id': partner.id, 'partner_name': partner.name, 'operation': 'update'})
+        self.assertEqual((create_job | update_job)._claim(), create_job)
+        create_job.unlink()
+        self.assertEqual(update_job._claim(), update_job)
+
+    def test_follow_up_create_becomes_update(self):
+        partner = self.create_synced_partner()
+        job = self.Job.create({'partner_id': partner.id, 'partner_name': partner.name, 'operation': 'create'})
+        self.assertEqual(job._prepare_request()['method'], 'PATCH')
+
+    def test_create_without_name(self):
+        company = self.Partner.create({'name': 'Company', 'is_company': True})
+        address = self.Partner.create({'type': 'invoice', 'parent_id': company.id, 'email': 'invoice@example.com'})
+        request = self.jobs(address)._prepare_request()
+        self.assertEqual(request['method'], 'POST')
+        self.assertNotIn('firstName', request['json']['defaultFields'])
+
+    def test_prepare_failure_isolated(self):
+        broken, other = self.Partner.create([{'name': 'Broken'}, {'name': 'Other'}])
+        jobs = self.jobs(broken) | self.jobs(other)
+
+        def prepare_request(job):
+            if job.partner_id == broken:
+                raise ValueError("Unexpected payload")
+            return None
+        self.patch(type(self.Job), '_prepare_request', prepare_request)
+        jobs._process_jobs()
+        self.assertRecordValues(self.jobs(broken), [{'state': 'failed', 'error': "Unexpected payload"}])
+        self.assertFalse(self.jobs(other), "The other jobs must still be processed")
+
+    def test_partner_deleted_during_create(self):
+        partner = self.Partner.create({'name': 'Deleted meanwhile', 'phone': '+15555550123'})
+        job = self.jobs(partner)
+
+        def send_requests(Job, requests_by_job):
+            # Another transaction deletes the partner while the creation is in
+            # flight; the locked job was skipped, so it queued nothing
+            partner.with_context(openphone_sync_origin='openphone').unlink()
+            return {job: FakeResponse(201, {'data': {'id': 'CT-orphan'}}) for job in requests_by_job}
+        self.patch(type(self.Job), '_send_requests', send_requests)
+        job._process_jobs()
+
+        self.assertFalse(job.exists())
+        self.assertRecordValues(self.Job.search([('openphone_contact_id', '=', 'CT-orphan')]), [{
+            'operation': 'delete',
+            'state': 'pending',
+            'partner_name': 'Deleted meanwhile',
+            'company_id': job.company_id.id,
+        }])
+
+    # Debounce window
+
+    def test_debounce(self):
+        self.ICP.set_param('openphone.sync.debounce', 10)
+        self.ICP.set_param('openphone.sync.debounce_max_delay', 60)
+        partner = self.create_synced_partner()
+        start = fields.Datetime.now()
+
+        with freeze_time(start):
+            partner.write({'function': 'Edit 1'})
+        job = self.jobs(partner)
+        self.assertEqual(job.scheduled_at, start + timedelta(seconds=10))
+        with freeze_time(start + timedelta(seconds=5)):
+            self.assertFalse(self.Job.search(self.Job._get_due_domain()) & job, "The window has not elapsed")
+            partner.write({'function': 'Edit 2'})
+        self.assertEqual(self.jobs(partner), job, "Edits must be coalesced")
+        self.assertEqual(job.scheduled_at, start + timedelta(seconds=15), "Each edit postpones the push")
+
+        with freeze_time(start + timedelta(seconds=55)):
+            partner.write({'function': 'Edit 3'})
+        self.assertEqual(job.scheduled_at, start + timedelta(seconds=15),
+                         "The push is not postponed past the maximum delay")
+        with freeze_time(start + timedelta(seconds=16)):
+            self.assertIn(job, self.Job.search(self.Job._get_due_domain()))
+
+    def test_delete_not_debounced(self):
+        self.ICP.set_param('openphone.sync.debounce', 10)
+        partner = self.create_synced_partner()
+        contact_id = partner.openphone_contact_id
+        partner.unlink()
+        job = self.Job.search([('openphone_contact_id', '=', contact_id)])
+        self.assertRecordValues(job, [{'operation': 'delete', 'scheduled_at': False}])
+        self.assertIn(job, self.Job.search(self.Job._get_due_domain()))
+
+    # Backoff and dead letters
+
+    def test_backoff(self):
+        partner = self.create_synced_partner()
+        partner.write({'function': 'Edited'})
+        job = self.jobs(partner)
+        now = fields.Datetime.now()
+
+        with freeze_time(now):
+            job._mark_failed("HTTP 500")
+        self.assertRecordValues(job, [{
+            'state': 'failed',
+            'attempt_count': 1,
+            'error': "HTTP 500",
+            'next_retry_at': now + timedelta(seconds=60),
+        }])
+        self.assertNotIn(job, self.Job.search(self.Job._get_due_domain()))
+
+        with freeze_time(now + timedelta(seconds=30)):
+            self.Job._cron_replay_failed_jobs()
+        self.assertEqual(job.state, 'failed', "The backoff has not elapsed")
+        with freeze_time(now + timedelta(seconds=60)):
+            self.Job._cron_replay_failed_jobs()
+        self.assertRecordValues(job, [{'state': 'pending', 'next_retry_at': False}])
+
+        with freeze_time(now):
+            job._mark_failed("HTTP 500", {'json': {'defaultFields': {'role': 'Edited'}}})
+        self.assertRecordValues(job, [{'attempt_count': 2, 'next_retry_at': now + timedelta(seconds=120)}])
+        self.assertIn('"role": "Edited"', job.payload)
+
+    def test_backoff_capped(self):
+        self.ICP.set_param('openphone.sync.max_attempts', 100)
+        partner = self.create_synced_partner()
+        partner.write({'function': 'Edited'})
+        job = self.jobs(partner)
+        job.attempt_count = 30
+        now = fields.Datetime.now()
+        with freeze_time(now):
+            job._mark_failed("HTTP 503")
+        self.assertEqual(job.next_retry_at, now + timedelta(seconds=MAX_RETRY_DELAY))
+
+    def test_dead_letter(self):
+        partner = self.create_synced_partner()
+        partner.write({'function': 'Edited'})
+        job = self.jobs(partner)
+        for _attempt in range(3):
+            job._mark_failed("HTTP 400")
+        self.assertRecordValues(job, [{'state': 'dead', 'attempt_count': 3, 'next_retry_at': False}])
+
+        self.Job._cron_replay_failed_jobs()
+        self.assertEqual(job.state, 'dead', "Dead letters are only retried manually")
+
+        job.action_retry()
+        self.assertRecordValues(job, [{'state': 'pending', 'attempt_count': 0, 'next_retry_at': False}])
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import base64
+import glob
+import json
+import os
+import time
+
+from odoo.tests import HttpCase, tagged
+
+from ..tools.webhook import DEFAULT_TOLERANCE, SIGNATURE_HEADER, signature_header
+
+SAMPLES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'tools', 'webhook_samples')
+SECRET = base64.b64encode(b'openphone-test-signing-secret').decode()
+
+
+@tagged('post_install', '-at_install')
+class TestOpenPhoneWebhook(HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['ir.config_parameter'].sudo().set_param('openphone.webhook.secret', SECRET)
+        cls.samples = {}
+        for path in sorted(glob.glob(os.path.join(SAMPLES_DIR, '*.json'))):
+            with open(path, 'rb') as f:
+                cls.samples[os.path.basename(path)] = f.read()
+        cls.Event = cls.env['openphone.webhook.event']
+        # Known partner, linked to the contact of the samples by its phone number
+        cls.partner = cls.env['res.partner'].with_context(openphone_sync_origin='openphone').create({
+            'name': 'Jane',
+            'phone': '(555) 555-0123',
+        })
+
+    def post(self, body, header):
+        headers = {'Content-Type': 'application/json'}
+        if header:
+            headers[SIGNATURE_HEADER] = header
+        return self.url_open('/openphone/webhook', data=body, headers=headers)
+
+    def event(self, body):
+        return self.Event.search([('event_id', '=', json.loads(body)['id'])])
+
+    def test_samples(self):
+        self.assertTrue(self.samples, "No webhook sample found")
+        for name, body in self.samples.items():
+            with self.subTest(sample=name):
+                response = self.post(body, signature_header(SECRET, body))
+                self.assertEqual(response.status_code, 200)
+                self.assertRecordValues(self.event(body), [{
+                    'event_type': json.loads(body)['type'],
+                    'state': 'pending',
+                }])
+
+        self.Event._cron_process_events()
+        events = self.Event.search([('event_id', 'in', [json.loads(body)['id'] for body in self.samples.values()])])
+        self.assertEqual(set(events.mapped('state')), {'done'}, events.mapped('error'))
+
+        self.assertRecordValues(self.partner, [{
+            'openphone_contact_id': '664d0db69fcac7cf2e6ec',
+            'name': 'Jane Doe',
+            'company_name': 'All City Cleaner',
+            'function': 'Office Manager',
+            'email': 'jane.doe@example.com',
+        }])
+        self.assertEqual(self.env['res.partner'].search_count([('openphone_contact_id', '=', '664d0db69fcac7cf2e6ec')]), 1,
+                         "The contact must be linked to the known partner, not duplicated")
+
+        call = self.env['openphone.call'].search([('call_id', '=', 'ACa29ee906a4e04312a6c7f8f5fdd1d8e4')])
+        self.assertRecordValues(call, [{
+            'direction': 'incoming',
+            'status': 'completed',
+            'duration': 127,
+            'phone_number_id': 'PNultOAaGq',
+            'participant': '+15555550123',
+            'has_recording': True,
+        }])
+        self.assertEqual(call.recording_url, f'/openphone/call/{call.id}/recording')
+        self.assertEqual(self.env['openphone.call.recording']._lookup([call.call_id]),
+                         {call.call_id: 'https://storage.googleapis.com/opstatics-dev/recording.mp3'})
+
+        message = self.env['openphone.message'].search([('message_id', '=', 'AC24a8b8321c4f4cf2be110f4250793d51')])
+        self.assertRecordValues(message, [{
+            'direction': 'incoming',
+            'body': "Hi, can you call me back about tomorrow's appointment?",
+            'status': 'received',
+            'partner_id': self.partner.id,
+        }])
+        self.assertRecordValues(message.conversation_id, [{
+            'conversation_id': 'CN78ba0373683c48fd8fd96bc836c51f79',
+            'phone_number_id': 'PNultOAaGq',
+            'participant': '+15555550123',
+        }])
+
+    def test_invalid_signature(self):
+        body = self.samples['call_completed.json']
+        other_secret = base64.b64encode(b'another-secret').decode()
+        for label, header in [
+            ('missing', None),
+            ('malformed', 'not-a-signature'),
+            ('wrong secret', signature_header(other_secret, body)),
+            ('tampered body', signature_header(SECRET, body + b' ')),
+        ]:
+            with self.subTest(signature=label):
+                self.assertEqual(self.post(body, header).status_code, 401)
+        self.assertFalse(self.event(body))
+
+    def test_expired_signature(self):
+        body = self.samples['call_completed.json']
+        expired_at = int((time.time() - DEFAULT_TOLERANCE - 60) * 1000)
+        self.assertEqual(self.post(body, signature_header(SECRET, body, expired_at)).status_code, 401)
+        self.assertFalse(self.event(body))
+
+    def test_duplicate_event(self):
+        body = self.samples['message_received.json']
+        for _attempt in range(2):
+            self.assertEqual(self.post(body, signature_header(SECRET, body)).status_code, 200)
+        self.assertEqual(len(self.event(body)), 1, "OpenPhone redeliveries must be stored once")
+
+        self.Event._cron_process_events()
+        self.assertEqual(self.event(body).state, 'done')
+        self.assertEqual(self.env['openphone.message'].search_count(
+            [('message_id', '=', 'AC24a8b8321c4f4cf2be110f4250793d51')]), 1)
@@ -0,0 +1,5 @@
+from . import cache
+from . import metrics
+from . import openphone_client
+from . import phone
+from . import webhook
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+In-process instrumentation of the OpenPhone API calls.
+
+The client records every HTTP attempt into the process-wide :data:`metrics`
+aggregator (per endpoint: requests, errors, retries, status codes, bytes
+received and a latency histogram). Aggregates are periodically flushed into the
+``openphone.sync.metric`` model so that all Odoo processes can be reported on.
+"""
+import threading
+import time
+from collections import Counter
+
+# Upper bounds (in seconds) of the latency histogram buckets; the last one is +Inf
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+def endpoint_name(method, url):
+    """
+    Return a low-cardinality ``METHOD /path`` name for a request URL: the
+    object IDs following the ``/v1/<collection>`` prefix are collapsed.
+    """
+    path = url.split('://', 1)[-1].split('?', 1)[0]
+    segments = path.split('/')[1:]
+    segments = segments[:2] + ['{id}'] * len(segments[2:])
+    return f"{method} /{'/'.join(segments)}"
+
+
+def _empty_entry():
+    return {
+        'requests': 0,
+        'errors': 0,
+        'retries': 0,
+        'bytes': 0,
+        'latency_sum': 0.0,
+        'latency_max': 0.0,
+        'buckets': [0] * len(LATENCY_BUCKETS),
+        'statuses': Counter(),
+    }
+
+
+class SyncMetrics:
+    """Thread-safe per-endpoint aggregates, drained by :meth:`pop`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.last_flush = time.monotonic()
+
+    def record(self, endpoint, status, latency, size=0, error=False):
+        """Record one HTTP attempt; ``status`` is the HTTP code or an error class name."""
+        with self._lock:
+            entry = self._entries.setdefault(endpoint, _empty_entry())
+            entry['requests'] += 1
+            entry['errors'] += 1 if error else 0
+            entry['bytes'] += size
+            entry['latency_sum'] += latency
+            entry['latency_max'] = max(entry['latency_max'], latency)
+            entry['statuses'][str(status)] += 1
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    entry['buckets'][index] += 1
+                    break
+
+    def record_retry(self, endpoint):
+        with self._lock:
+            self._entries.setdefault(endpoint, _empty_entry())['retries'] += 1
+
+    def pop(self):
+        """Return the aggregates recorded since the previous call and reset them."""
+        with self._lock:
+            entries, self._entries = self._entries, {}
+            self.last_flush = time.monotonic()
+        return entries
+
+    def is_flush_due(self, interval):
+        return bool(self._entries) and time.monotonic() - self.last_flush >= interval
+
+
+metrics = SyncMetrics()
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+Shared HTTP client for the OpenPhone API.
+
+All OpenPhone calls of the module go through :class:`OpenPhoneClient` so that
+they reuse a pooled keep-alive session, have connect/read timeouts, retry
+transient failures with exponential backoff (honoring ``Retry-After``), are
+throttled by a token-bucket rate limiter and are instrumented in
+:mod:`.metrics`. Sessions and rate limiters are kept per process and per API
+key, so that each OpenPhone workspace has its own connections and quota.
+Request/response bodies are only logged for a sample of calls.
+"""
+import hashlib
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from odoo import SUPERUSER_ID, api
+from odoo.tools import config
+
+from .metrics import endpoint_name, metrics
+
+_logger = logging.getLogger(__name__)
+
+OPENPHONE_API_URL = "https://api.openphone.com/v1"
+
+# OpenPhone allows 10 requests per second per API key
+DEFAULT_RATE_LIMIT = 10.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_POOL_SIZE = 16
+DEFAULT_BODY_LOG_SAMPLE_RATE = 0.01
+DEFAULT_METRICS_FLUSH_INTERVAL = 60
+BODY_LOG_MAX_SIZE = 2000
+MAX_BACKOFF = 60.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# POST is not idempotent: it is only retried when OpenPhone did not process it (429, connect errors)
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PATCH', 'PUT', 'DELETE'}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_lock = threading.Lock()
+# Per API key fingerprint; sessions are dropped after a fork
+_sessions = {}
+_sessions_pid = None
+_buckets = {}
+
+
+def api_key_fingerprint(api_key):
+    """Identify an API key without keeping it around in clear."""
+    return hashlib.sha1((api_key or '').encode()).hexdigest()
+
+
+def _get_session(api_key=None):
+    """Return the pooled session of the API key in the current process."""
+    global _sessions_pid
+    fingerprint = api_key_fingerprint(api_key)
+    with _lock:
+        if _sessions_pid != os.getpid():
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+        session = _sessions.get(fingerprint)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DEFAULT_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[fingerprint] = session
+        return session
+
+
+def process_rate_limit(rate_limit):
+    """
+    Share of the per API key rate limit available to the current process.
+    OpenPhone enforces its rate limit per API key; it is split evenly between
+    the Odoo processes that may call OpenPhone concurrently.
+    """
+    processes = (config['workers'] + config['max_cron_threads']) if config['workers'] else 1
+    return max(rate_limit / max(processes, 1), 0.1)
+
+
+def cron_time_limit():
+    """Real time limit of a cron job in seconds, or None when unlimited."""
+    limit = config.get('limit_time_real_cron')
+    if limit is None or limit < 0:
+        limit = config.get('limit_time_real')
+    return limit if limit and limit > 0 else None
+
+
+def _get_bucket(rate_limit, api_key=None):
+    """Return the rate limiter of the API key in the current process."""
+    rate = process_rate_limit(rate_limit)
+    fingerprint = api_key_fingerprint(api_key)
+    with _lock:
+        bucket = _buckets.get(fingerprint)
+        if bucket is None or bucket.rate != rate:
+            bucket = _buckets[fingerprint] = TokenBucket(rate)
+        return bucket
+
+
+def _retry_after(response):
+    """Return the delay requested by a ``Retry-After`` header, in seconds."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class OpenPhoneClient:
+    """
+    Rate-limited, retrying OpenPhone API client. Each request goes through the
+    session and rate limiter of the API key in its ``Authorization`` header,
+    ``api_key`` being used for the requests that have none.
+    """
+
+    def __init__(self, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                 rate_limit=DEFAULT_RATE_LIMIT, base_url=OPENPHONE_API_URL,
+                 body_log_sample_rate=DEFAULT_BODY_LOG_SAMPLE_RATE, api_key=None):
+        self.base_url = base_url.rstrip('/')
+        self.body_log_sample_rate = body_log_sample_rate
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.rate_limit = rate_limit
+        self.api_key = api_key
+
+    def _backoff(self, attempt):
+        delay = self.backoff_factor * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), MAX_BACKOFF)
+
+    def _log_body(self, method, url, kwargs, response):
+        """Log the bodies of a sample of the calls, never the headers."""
+        if not _logger.isEnabledFor(logging.DEBUG) or random.random() >= self.body_log_sample_rate:
+            return
+        _logger.debug("OpenPhone %s %s -> %s\nrequest: %s\nresponse: %s",
+                      method, url, response.status_code, kwargs.get('json') or kwargs.get('params'),
+                      response.text[:BODY_LOG_MAX_SIZE])
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request to OpenPhone. ``url`` may be absolute or a path relative
+        to the API root; absolute OpenPhone URLs are redirected to ``base_url``
+        (e.g. a local stand-in server). Returns the last response once retries are exhausted;
+        network errors are re-raised as ``requests`` exceptions.
+        """
+        method = method.upper()
+        if not url.startswith('http'):
+            url = f"{self.base_url}/{url.lstrip('/')}"
+        elif self.base_url != OPENPHONE_API_URL and url.startswith(OPENPHONE_API_URL):
+            url = self.base_url + url[len(OPENPHONE_API_URL):]
+        kwargs.setdefault('timeout', self.timeout)
+        headers = kwargs.get('headers') or {}
+        api_key = headers.get('Authorization') or self.api_key
+        if api_key and 'Authorization' not in headers:
+            kwargs['headers'] = dict(headers, Authorization=api_key)
+        session = _get_session(api_key)
+        bucket = _get_bucket(self.rate_limit, api_key)
+        idempotent = method in IDEMPOTENT_METHODS
+        endpoint = endpoint_name(method, url)
+
+        attempt = 0
+        while True:
+            bucket.acquire()
+            start = time.monotonic()
+            try:
+                response = session.request(method, url, **kwargs)
+            except requests.exceptions.ConnectTimeout as e:
+                metrics.record(endpoint, type(e).__name__, time.monotonic() - start, error=True)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.record(endpoint, type(e).__name__, time.monotonic() - start, error=True)
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                metrics.record(endpoint, response.status_code, time.monotonic() - start,
+                               len(response.content), error=response.status_code >= 400)
+                self._log_body(method, url, kwargs, response)
+                retryable = response.status_code == 429 or (idempotent and response.status_code in RETRY_STATUSES)
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                delay = _retry_after(response)
+                delay = min(delay, MAX_BACKOFF) if delay is not None else self._backoff(attempt)
+
+            attempt += 1
+            metrics.record_retry(endpoint)
+            _logger.info("Retrying OpenPhone %s %s in %.1fs (attempt %d/%d)",
+                         method, url, delay, attempt, self.max_retries)
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+def flush_metrics(env):
+    """
+    Store the metrics aggregated by this process since the last flush. A
+    separate cursor is used so they are kept even if the caller rolls back.
+    """
+    entries = metrics.pop()
+    if not entries:
+        return
+    try:
+        with env.registry.cursor() as cr:
+            metric_env = api.Environment(cr, SUPERUSER_ID, {})
+            metric_env['openphone.sync.metric']._store(entries, f"{socket.gethostname()}:{os.getpid()}")
+    except Exception:
+        _logger.warning("Could not store OpenPhone sync metrics", exc_info=True)
+
+
+def get_openphone_client(env, api_key=None):
+    """
+    Build a client configured from the ``openphone.*`` system parameters,
+    sending the requests without ``Authorization`` header with ``api_key``.
+    """
+    get_param = env['ir.config_parameter'].sudo().get_param
+    if metrics.is_flush_due(int(get_param('openphone.metrics.flush_interval', DEFAULT_METRICS_FLUSH_INTERVAL))):
+        flush_metrics(env)
+    return OpenPhoneClient(
+        connect_timeout=float(get_param('openphone.http.connect_timeout', DEFAULT_CONNECT_TIMEOUT)),
+        read_timeout=float(get_param('openphone.http.read_timeout', DEFAULT_READ_TIMEOUT)),
+        max_retries=int(get_param('openphone.http.max_retries', DEFAULT_MAX_RETRIES)),
+        backoff_factor=float(get_param('openphone.http.backoff_factor', DEFAULT_BACKOFF_FACTOR)),
+        rate_limit=float(get_param('openphone.rate_limit', DEFAULT_RATE_LIMIT)),
+        base_url=get_param('openphone.api.url') or OPENPHONE_API_URL,
+        body_log_sample_rate=float(get_param('openphone.log.body_sample_rate', DEFAULT_BODY_LOG_SAMPLE_RATE)),
+        api_key=api_key,
+    )
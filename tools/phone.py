@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+import re
+
+_EXTENSION_RE = re.compile(r'\s*(?:ext\.?|x|#)\s*\d+\s*$', re.IGNORECASE)
+
+def normalize_phone_number(phone, default_country_code='1'):
+    """
+    Normalize a free-text phone number to E.164 (``+<country><number>``):
+    drop spaces, dashes, parentheses and extensions, turn a ``00`` international
+    prefix into ``+`` and assume ``default_country_code`` for national numbers.
+    Returns False when the value contains no digits.
+    """
+    if not phone:
+        return False
+    phone = _EXTENSION_RE.sub('', phone.strip())
+    digits = ''.join(c for c in phone if c.isdigit())
+    if not digits:
+        return False
+    if phone.startswith('+'):
+        return '+' + digits
+    if digits.startswith('00'):
+        return '+' + digits[2:]
+    if len(digits) == 10 + len(default_country_code) and digits.startswith(default_country_code):
+        return '+' + digits
+    return '+' + default_country_code + digits
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+OpenPhone webhook signatures, and a local stand-in sender.
+
+OpenPhone signs each webhook with an ``openphone-signature`` header of the form
+``hmac;1;<timestamp>;<signature>`` where ``signature`` is the base64 encoded
+HMAC-SHA256 of ``<timestamp>.<raw body>`` keyed with the base64 decoded signing
+secret of the webhook.
+
+This file only depends on the standard library (and ``requests`` for sending)
+so it can be run directly to replay recorded payloads against a local Odoo::
+
+    python tools/webhook.py --secret <base64 secret> \\
+        --url http://localhost:8069/openphone/webhook tools/webhook_samples/*.json
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+SIGNATURE_HEADER = 'openphone-signature'
+# Signatures older than this (in seconds) are rejected to prevent replays
+DEFAULT_TOLERANCE = 300
+
+
+def sign_payload(secret, timestamp, body):
+    """Return the base64 HMAC-SHA256 signature of ``body`` at ``timestamp`` (in ms)."""
+    if isinstance(body, str):
+        body = body.encode()
+    key = base64.b64decode(secret)
+    signed_data = str(timestamp).encode() + b'.' + body
+    return base64.b64encode(hmac.new(key, signed_data, hashlib.sha256).digest()).decode()
+
+
+def signature_header(secret, body, timestamp=None):
+    """Build the ``openphone-signature`` header value for ``body``."""
+    timestamp = timestamp or int(time.time() * 1000)
+    return f"hmac;1;{timestamp};{sign_payload(secret, timestamp, body)}"
+
+
+def verify_signature(secret, header, body, tolerance=DEFAULT_TOLERANCE):
+    """Check an ``openphone-signature`` header against the raw request body."""
+    if not secret or not header:
+        return False
+    try:
+        scheme, version, timestamp, signature = header.split(';', 3)
+        timestamp = int(timestamp)
+    except ValueError:
+        return False
+    if scheme != 'hmac' or version != '1':
+        return False
+    if tolerance and abs(time.time() * 1000 - timestamp) > tolerance * 1000:
+        return False
+    try:
+        expected = sign_payload(secret, timestamp, body)
+    except ValueError:
+        return False
+    return hmac.compare_digest(expected, signature)
+
+
+def main():
+    import requests
+
+    parser = argparse.ArgumentParser(description="Post signed OpenPhone webhook payloads to an Odoo instance.")
+    parser.add_argument('payloads', nargs='+', help="JSON files holding recorded webhook events")
+    parser.add_argument('--url', default='http://localhost:8069/openphone/webhook')
+    parser.add_argument('--secret', required=True, help="Base64 signing secret configured in Odoo")
+    args = parser.parse_args()
+
+    for path in args.payloads:
+        with open(path, 'rb') as f:
+            # Re-serialize compactly, as OpenPhone does, so the body is signed exactly as sent
+            body = json.dumps(json.load(f), separators=(',', ':')).encode()
+        response = requests.post(args.url, data=body, timeout=10, headers={
+            'Content-Type': 'application/json',
+            SIGNATURE_HEADER: signature_header(args.secret, body),
+        })
+        print(f"{path}: {response.status_code} {response.text[:200]}")
+
+
+if __name__ == '__main__':
+    main()